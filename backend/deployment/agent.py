@@ -3,117 +3,176 @@ from prompts import *
 from schema import *
 from tools import *
 import configuration
+import memory
+from retrieval import aretrieve_documents
+from sqlite_store import SqliteStore
+from sqlite_checkpointer import SqliteCheckpointer
+from scheduler import Scheduler, INTERACTIVE, BACKGROUND
+from metrics import GraphMetrics, InstrumentedStore, serve_metrics
+from response_cache import ResponseCache
+from report_drafts import ReportDrafts
+from posting_index import aget_digest, asave_digests, render_digest
+from models import ModelPool
+from router import FastRouter, BEGIN_INTERVIEW, REPLY, CANNED_REPLY
 
 
-from trustcall import create_extractor
-from langchain_openai import ChatOpenAI
 from langgraph.checkpoint.memory import MemorySaver
 from langgraph.graph import StateGraph, MessagesState, END, START
 from langgraph.store.base import BaseStore
 from langgraph.store.memory import InMemoryStore
 from langchain_core.runnables import RunnableConfig
-from langchain_core.messages import merge_message_runs, HumanMessage, SystemMessage
+from langchain_core.messages import merge_message_runs, get_buffer_string, AIMessage, HumanMessage, SystemMessage
+from langchain_core.messages.utils import count_tokens_approximately
+from langgraph.constants import Send
+from langgraph.config import get_stream_writer
 
 from datetime import datetime
 import uuid
 import operator
-from typing import Annotated, List
+from typing import Annotated, List, Union
 
-# Model initialization
-model = ChatOpenAI(model="gpt-4o-mini", temperature=0)
+# Model initialization: one pooled client per model name, assigned to nodes by Configuration
+model_pool = ModelPool()
 
 
 class ParentState(MessagesState):
   """ Parent state for the system """
   final_report: Optional[str] = None
-  active_application: Optional[Application] = None
+  active_application: Optional[dict] = None # Application to interview for, instead of the saved one
+  active_application_id: Optional[str] = None # Key of the application begin_interview selected for this thread
   annotated_resume: Optional[AnnotatedResume] = None
   applications: Optional[JobApplications] = None
   documents: Optional[DocumentCollection] = None
   max_interviews: int = 3
+  max_analysts: int = 2
   human_analyst_feedback: Optional[str] = None
   analysts: Optional[list[Analyst]] = None
+  report_id: Optional[str] = None # Running report draft the interviews merge their sections into
+  requirements: Optional[str] = None # Rendered requirement digest of the interview's posting
   sections: Annotated[List, operator.add] = None
+  memory_watermarks: Annotated[dict, operator.or_] # Newest message reflected into each memory namespace
+  summary: Optional[str] = None # Rolling summary of the messages hunter no longer sees
+  summarized_through: Optional[str] = None # ID of the newest message folded into the summary
+  route_prediction: Optional[dict] = None # Fast path prediction for the latest user message
 
 # Agent
 
+# Fast path
+async def fast_route(state: ParentState, config: RunnableConfig):
+    """Answer acknowledgements and start requested interviews without calling the hunter LLM.
+
+    Messages the local classifier is not confident about go on to hunter as usual.
+    """
+    configurable = configuration.Configuration.from_runnable_config(config)
+    message = state["messages"][-1]
+    if not configurable.fast_path or not isinstance(message, HumanMessage):
+        return {"route_prediction": None}
+
+    # Hunter's last reply, in case it is waiting for an answer to a question
+    previous = next((m for m in reversed(state["messages"][:-1]) if isinstance(m, AIMessage) and m.content), None)
+    label, prediction = fast_router.decide(str(message.content), str(previous.content) if previous else None)
+    if label == BEGIN_INTERVIEW:
+        # The same tool call hunter would make, so begin_interview handles it as usual
+        tool_call = {"name": "UpdateMemory", "args": {"update_type": "active_application"},
+                     "id": f"call_{uuid.uuid4().hex}", "type": "tool_call"}
+        return {"messages": [AIMessage(content="", tool_calls=[tool_call])], "route_prediction": prediction}
+    if label == REPLY:
+        return {"messages": [AIMessage(content=CANNED_REPLY)], "route_prediction": prediction}
+    return {"route_prediction": prediction}
+
+def route_fast(state: ParentState) -> Literal[END, "summarize_history", "begin_interview"]:
+    """ Follow the fast path's decision, or go on to hunter """
+    message = state["messages"][-1]
+    if isinstance(message, AIMessage):
+        return "begin_interview" if message.tool_calls else END
+    return "summarize_history"
+
+# Summarize history
+async def summarize_history(state: ParentState, config: RunnableConfig):
+    """Fold older messages into the rolling summary once hunter's history exceeds its token budget.
+
+    The messages stay in the thread; hunter only sends the ones after `summarized_through`.
+    """
+    configurable = configuration.Configuration.from_runnable_config(config)
+    model = model_pool.get(configurable.model_for("memory"))
+    budget = configurable.history_token_budget
+    messages = unsummarized_messages(state["messages"], state.get("summarized_through"))
+    if not budget or count_tokens_approximately(messages) <= budget:
+        return None
+
+    # Keep about half the budget of recent history so summaries are not rewritten every turn
+    cut = history_cut(messages, budget // 2)
+    if cut == 0:
+        return None
+    system_msg = SUMMARIZE_HISTORY_INSTRUCTIONS.format(summary=state.get("summary"))
+    summary = await scheduler.call(
+        lambda: model.ainvoke([SystemMessage(content=system_msg), HumanMessage(content=get_buffer_string(messages[:cut]))]),
+        model=model, priority=INTERACTIVE,
+    )
+    return {"summary": summary.content, "summarized_through": messages[cut - 1].id}
+
 
-def hunter(state: ParentState, config: RunnableConfig, store: BaseStore):
+async def hunter(state: ParentState, config: RunnableConfig, store: BaseStore):
 
     """Load memories from the store and use them to personalize the chatbot's response."""
     
     # Get the user ID from the config
     configurable = configuration.Configuration.from_runnable_config(config)
+    model = model_pool.get(configurable.model_for("hunter"))
     user_id = configurable.user_id
     # hunter_role = configurable.hunter_role
     
-    namespace = ("active_application", user_id)
-    memories = store.search(namespace)
-    if memories:
-        active_application = memories[0].value
-    else:
-        active_application = None
-
-    # Retrieve profile memory from the store
-    namespace = ("annotated_resume", user_id)
-    memories = store.search(namespace)
-    if memories:
-        resume = memories[0].value
-    else:
-        resume = None
+    # Read all memories through the per-user snapshot
+    snapshot = await memory.aget_snapshot(store, user_id)
 
-    # Retrieve custom instructions
-    namespace = ("instructions", user_id)
-    memories = store.search(namespace)
-    if memories:
-        instructions = memories[0].value
-    else:
-        instructions = None
-
-    # Retrieve job applications
-    namespace = ("applications", user_id)
-    memories = store.search(namespace)
-    if memories:
-        job_applications = memories[0].value
-    else:
-        job_applications = None
+    # Only include the document chunks relevant to the latest user message
+    query = next((str(m.content) for m in reversed(state["messages"]) if isinstance(m, HumanMessage)), "")
+    documents = await aretrieve_documents(snapshot, query, configurable)
 
-    # Retrieve documents
-    namespace = ("documents", user_id)
-    memories = store.search(namespace)
-    if memories:
-        documents = memories[0].value
-    else:
-        documents = None
-    
+    budget = configurable.memory_section_budget
     system_msg = MODEL_SYSTEM_MESSAGE.format(
         # hunter_role=hunter_role,
-        annotated_resume=resume, job_applications=job_applications, 
-        documents=documents,  instructions=instructions
+        annotated_resume=render_memory(snapshot.annotated_resume, budget),
+        job_applications=render_memory(snapshot.applications, budget),
+        documents=documents,  instructions=render_memory(snapshot.instructions)
+    )
+
+    # Respond using memory as well as the summarized chat history
+    history = unsummarized_messages(state["messages"], state.get("summarized_through"))
+    if state.get("summary"):
+        history = [SystemMessage(content=HISTORY_SUMMARY_MESSAGE.format(summary=state["summary"]))] + history
+    # TODO: Add more tools
+    response = await scheduler.call(
+        lambda: model.bind_tools([UpdateMemory], parallel_tool_calls=True).ainvoke(
+            [SystemMessage(content=system_msg)]+history
+        ),
+        model=model, priority=INTERACTIVE,
     )
 
-    # Respond using memory as well as the chat history
-    # TODO: Add more tools and allow parallel tool calls
-    response = model.bind_tools(
-        [UpdateMemory], parallel_tool_calls=False
-    ).invoke([SystemMessage(content=system_msg)]+state["messages"])
+    # Check the fast path's prediction against the LLM's routing of a new user message
+    if isinstance(state["messages"][-1], HumanMessage):
+        fast_router.record(state.get("route_prediction"), response.tool_calls)
 
     return {"messages": [response]}
 
+# Trustcall document ID of a collection reassembled from its entries
+COLLECTION_DOC_ID = "collection"
+
 # Update resume
-def update_resume(state: ParentState, config: RunnableConfig, store: BaseStore):
+async def update_resume(state: ParentState, config: RunnableConfig, store: BaseStore):
 
     """Reflect on the chat history and update the memory collection."""
     
     # Get the user ID from the config
     configurable = configuration.Configuration.from_runnable_config(config)
+    model = model_pool.get(configurable.model_for("memory"))
     user_id = configurable.user_id
 
     # Define the namespace for the memories
     namespace = ("annotated_resume", user_id)
 
     # Retrieve the most recent memories for context
-    existing_items = store.search(namespace)
+    existing_items = await store.asearch(namespace)
 
     # Format the existing memories for the Trustcall extractor
     tool_name = "AnnotatedResume"
@@ -122,260 +181,297 @@ def update_resume(state: ParentState, config: RunnableConfig, store: BaseStore):
           for existing_item in existing_items] if existing_items else None
     )
 
-    # Merge the chat history and the instruction
+    # Merge the instruction with the chat history not yet reflected into this memory
     TRUSTCALL_INSTRUCTION_FORMATTED=TRUSTCALL_INSTRUCTION.format(time=datetime.now().isoformat())
-    updated_messages=list(merge_message_runs(messages=[SystemMessage(content=TRUSTCALL_INSTRUCTION_FORMATTED)] + state["messages"][:-1]))
+    updated_messages, watermark = reflection_messages(
+        TRUSTCALL_INSTRUCTION_FORMATTED,
+        state["messages"][:-1],
+        watermark=(state.get("memory_watermarks") or {}).get(namespace[0]),
+        window=configurable.memory_context_window if configurable.memory_update_mode == "incremental" else None,
+    )
+    if updated_messages is None:
+        return {"messages": tool_messages(state, "resume already up to date")}
 
-    profile_extractor = create_extractor(
-      model,
-      tools=[AnnotatedResume],
-      tool_choice="AnnotatedResume",
-  )
+    profile_extractor = get_extractor(model, AnnotatedResume)
     # Invoke the extractor
-    result = profile_extractor.invoke({"messages": updated_messages, 
-                                         "existing": existing_memories})
+    result = await scheduler.call(
+        lambda: profile_extractor.ainvoke({"messages": updated_messages, "existing": existing_memories}),
+        model=model, priority=INTERACTIVE,
+    )
 
-    # Save the memories from Trustcall to the store
-    for r, rmeta in zip(result["responses"], result["response_metadata"]):
-        store.put(namespace,
-                  rmeta.get("json_doc_id", str(uuid.uuid4())),
-                  r.model_dump(mode="json"),
-            )
-    tool_calls = state['messages'][-1].tool_calls
-    return {"messages": [{"role": "tool", "content": "updated resume", "tool_call_id":tool_calls[0]['id']}]}
+    # Save the memories from Trustcall to the store, skipping unchanged documents
+    written, skipped = await save_responses(store, namespace, result, existing_items)
+    if written:
+        await memory.ainvalidate(store, user_id)
+    return {"messages": tool_messages(state, write_summary("updated resume", written, skipped)),
+            "memory_watermarks": {namespace[0]: watermark}}
 
 # Update job applications
-def update_job_applications(state: MessagesState, config: RunnableConfig, store: BaseStore):
+async def update_job_applications(state: MessagesState, config: RunnableConfig, store: BaseStore):
 
     """Reflect on the chat history and update the memory collection."""
     
     # Get the user ID from the config
     configurable = configuration.Configuration.from_runnable_config(config)
+    model = model_pool.get(configurable.model_for("memory"))
     user_id = configurable.user_id
 
     # Define the namespace for the memories
     namespace = ("applications", user_id)
 
-    # Retrieve the most recent memories for context
-    existing_items = store.search(namespace)
+    # Reassemble the collection from its stored entries
+    existing, existing_items = await memory.aload_collection(store, namespace)
 
     # Format the existing memories for the Trustcall extractor
     tool_name = "JobApplications"
-    existing_memories = ([(existing_item.key, tool_name, existing_item.value)
-                          for existing_item in existing_items]
-                          if existing_items
-                          else None
-                        )
+    existing_memories = [(COLLECTION_DOC_ID, tool_name, existing)] if existing else None
 
-    # Merge the chat history and the instruction
+    # Merge the instruction with the chat history not yet reflected into this memory
     TRUSTCALL_INSTRUCTION_FORMATTED=TRUSTCALL_INSTRUCTION.format(time=datetime.now().isoformat())
-    updated_messages=list(merge_message_runs(messages=[SystemMessage(content=TRUSTCALL_INSTRUCTION_FORMATTED)] + state["messages"][:-1]))
+    updated_messages, watermark = reflection_messages(
+        TRUSTCALL_INSTRUCTION_FORMATTED,
+        state["messages"][:-1],
+        watermark=(state.get("memory_watermarks") or {}).get(namespace[0]),
+        window=configurable.memory_context_window if configurable.memory_update_mode == "incremental" else None,
+    )
+    if updated_messages is None:
+        return {"messages": tool_messages(state, "job applications already up to date")}
 
     # Initialize the spy for visibility into the tool calls made by Trustcall
     spy = Spy()
     
-    # Create the Trustcall extractor for updating the JobApplications list 
-    todo_extractor = create_extractor(
-    model,
-    tools=[JobApplications],
-    tool_choice=tool_name,
-    enable_inserts=True
-    ).with_listeners(on_end=spy)
+    # Get the prebuilt Trustcall extractor for updating the JobApplications list
+    todo_extractor = get_extractor(model, JobApplications, enable_inserts=True, spy=spy)
 
     # Invoke the extractor
-    result = todo_extractor.invoke({"messages": updated_messages, 
-                                    "existing": existing_memories})
+    result = await scheduler.call(
+        lambda: todo_extractor.ainvoke({"messages": updated_messages, "existing": existing_memories}),
+        model=model, priority=INTERACTIVE,
+    )
 
-    # Save the memories from Trustcall to the store
-    for r, rmeta in zip(result["responses"], result["response_metadata"]):
-        store.put(namespace,
-                  rmeta.get("json_doc_id", str(uuid.uuid4())),
-                  r.model_dump(mode="json"),
-            )
+    # Save the changed entries of the collection, one item per entry
+    collection = merge_responses(existing, result, "applications", COLLECTION_DOC_ID)
+    written, skipped, changed = await memory.asave_collection(store, namespace, collection, existing_items)
+
+    # Index the requirements of new or changed postings
+    await asave_digests(store, [application.get("posting") for application in collection["applications"]])
+    if changed:
+        await memory.ainvalidate(store, user_id)
         
     # Respond to the tool call made in agent, confirming the update
-    tool_calls = state['messages'][-1].tool_calls
 
     # Extract the changes made by Trustcall and add the the ToolMessage returned to agent
     application_update_msg = extract_tool_info(spy.called_tools, tool_name)
-    return {"messages": [{"role": "tool", "content": application_update_msg, "tool_call_id":tool_calls[0]['id']}]}
+    return {"messages": tool_messages(state, write_summary(application_update_msg, written, skipped)),
+            "memory_watermarks": {namespace[0]: watermark}}
 
 # Update instructions
-def update_instructions(state: ParentState, config: RunnableConfig, store: BaseStore):
+async def update_instructions(state: ParentState, config: RunnableConfig, store: BaseStore):
 
     """Reflect on the chat history and update the memory collection."""
     
     # Get the user ID from the config
     configurable = configuration.Configuration.from_runnable_config(config)
+    model = model_pool.get(configurable.model_for("memory"))
     user_id = configurable.user_id
     
     namespace = ("instructions", user_id)
 
-    existing_memory = store.get(namespace, "user_instructions")
+    existing_memory = await store.aget(namespace, "user_instructions")
         
     # Format the memory in the system prompt
     system_msg = CREATE_INSTRUCTIONS.format(current_instructions=existing_memory.value if existing_memory else None)
-    new_memory = model.invoke([SystemMessage(content=system_msg)]+state['messages'][:-1] + [HumanMessage(content="Please update the instructions based on the conversation")])
+    new_memory = await scheduler.call(
+        lambda: model.ainvoke([SystemMessage(content=system_msg)]+state['messages'][:-1] + [HumanMessage(content="Please update the instructions based on the conversation")]),
+        model=model, priority=INTERACTIVE,
+    )
 
-    # Overwrite the existing memory in the store 
+    # Overwrite the existing memory in the store, unless the instructions did not change
     key = "user_instructions"
-    store.put(namespace, key, {"memory": new_memory.content})
-    tool_calls = state['messages'][-1].tool_calls
-    return {"messages": [{"role": "tool", "content": "updated instructions", "tool_call_id":tool_calls[0]['id']}]}
+    value = {"memory": new_memory.content}
+    if existing_memory is not None and content_hash(existing_memory.value) == content_hash(value):
+        return {"messages": tool_messages(state, write_summary("instructions unchanged", 0, 1))}
+    await store.aput(namespace, key, value)
+    await memory.ainvalidate(store, user_id)
+    return {"messages": tool_messages(state, write_summary("updated instructions", 1, 0))}
 
 # Update documents
-def update_documents(state: ParentState, config: RunnableConfig, store: BaseStore):
+async def update_documents(state: ParentState, config: RunnableConfig, store: BaseStore):
     """Reflect on the chat history and update the memory collection."""
     
     # Get the user ID from the config
     configurable = configuration.Configuration.from_runnable_config(config)
+    model = model_pool.get(configurable.model_for("memory"))
     user_id = configurable.user_id
 
     # Define the namespace for the memories
     namespace = ("documents", user_id)
 
-    # Retrieve the most recent memories for context
-    existing_items = store.search(namespace)
+    # Reassemble the collection from its stored entries
+    existing, existing_items = await memory.aload_collection(store, namespace)
 
     # Format the existing memories for the Trustcall extractor
     tool_name = "DocumentCollection"
-    existing_memories = ([(existing_item.key, tool_name, existing_item.value)
-                          for existing_item in existing_items]
-                          if existing_items
-                          else None
-                        )
+    existing_memories = [(COLLECTION_DOC_ID, tool_name, existing)] if existing else None
 
-    # Merge the chat history and the instruction
+    # Merge the instruction with the chat history not yet reflected into this memory
     TRUSTCALL_INSTRUCTION_FORMATTED=TRUSTCALL_INSTRUCTION.format(time=datetime.now().isoformat())
-    updated_messages=list(merge_message_runs(messages=[SystemMessage(content=TRUSTCALL_INSTRUCTION_FORMATTED)] + state["messages"][:-1]))
+    updated_messages, watermark = reflection_messages(
+        TRUSTCALL_INSTRUCTION_FORMATTED,
+        state["messages"][:-1],
+        watermark=(state.get("memory_watermarks") or {}).get(namespace[0]),
+        window=configurable.memory_context_window if configurable.memory_update_mode == "incremental" else None,
+    )
+    if updated_messages is None:
+        return {"messages": tool_messages(state, "documents already up to date")}
 
     # Initialize the spy for visibility into the tool calls made by Trustcall
     spy = Spy()
     
-    # Create the Trustcall extractor for updating the DocumentCollection
-    todo_extractor = create_extractor(
-    model,
-    tools=[DocumentCollection],
-    tool_choice=tool_name,
-    enable_inserts=True
-    ).with_listeners(on_end=spy)
+    # Get the prebuilt Trustcall extractor for updating the DocumentCollection
+    todo_extractor = get_extractor(model, DocumentCollection, enable_inserts=True, spy=spy)
 
     # Invoke the extractor
-    result = todo_extractor.invoke({"messages": updated_messages, 
-                                    "existing": existing_memories})
+    result = await scheduler.call(
+        lambda: todo_extractor.ainvoke({"messages": updated_messages, "existing": existing_memories}),
+        model=model, priority=INTERACTIVE,
+    )
 
-    # Save the memories from Trustcall to the store
-    for r, rmeta in zip(result["responses"], result["response_metadata"]):
-        store.put(namespace,
-                  rmeta.get("json_doc_id", str(uuid.uuid4())),
-                  r.model_dump(mode="json"),
-            )
+    # Save the changed entries of the collection, one item per entry
+    collection = merge_responses(existing, result, "documents", COLLECTION_DOC_ID)
+    written, skipped, changed = await memory.asave_collection(store, namespace, collection, existing_items)
+    if changed:
+        await memory.ainvalidate(store, user_id)
         
     # Respond to the tool call made in agent, confirming the update
-    tool_calls = state['messages'][-1].tool_calls
 
     # Extract the changes made by Trustcall and add the the ToolMessage returned to agent
     document_update_msg = extract_tool_info(spy.called_tools, tool_name)
-    return {"messages": [{"role": "tool", "content": document_update_msg, "tool_call_id":tool_calls[0]['id']}]}
+    return {"messages": tool_messages(state, write_summary(document_update_msg, written, skipped)),
+            "memory_watermarks": {namespace[0]: watermark}}
 
 # begin_interview
-def begin_interview(state: ParentState, config: RunnableConfig, store: BaseStore):
+async def begin_interview(state: ParentState, config: RunnableConfig, store: BaseStore):
     """Reflect on the chat history and update the memory collection."""
     
     # Get the user ID from the config
     configurable = configuration.Configuration.from_runnable_config(config)
+    model = model_pool.get(configurable.model_for("memory"))
     user_id = configurable.user_id
 
     # Define the namespace for the memories
     namespace = ("active_application", user_id)
 
-    # Retrieve the most recent memories for context
-    existing_items = store.search(namespace)
+    # Start from the application this thread has selected, looked up by its ID
+    selected_id = state.get("active_application_id")
+    selected = await store.aget(namespace, selected_id) if selected_id else None
 
     # Format the existing memories for the Trustcall extractor
     tool_name = "Application"
-    existing_memories = ([(existing_item.key, tool_name, existing_item.value)
-                          for existing_item in existing_items]
-                          if existing_items
-                          else None
-                        )
+    existing_memories = [(selected.key, tool_name, selected.value)] if selected else None
 
-    # Merge the chat history and the instruction
+    # Merge the instruction with the whole chat history. The application defines what the
+    # interview is about, and its posting may have been pasted anywhere earlier in the thread,
+    # so unlike the other memories it is not updated incrementally
     TRUSTCALL_INSTRUCTION_FORMATTED=TRUSTCALL_INSTRUCTION.format(time=datetime.now().isoformat())
-    updated_messages=list(merge_message_runs(messages=[SystemMessage(content=TRUSTCALL_INSTRUCTION_FORMATTED)] + state["messages"][:-1]))
+    updated_messages, _ = reflection_messages(TRUSTCALL_INSTRUCTION_FORMATTED, state["messages"][:-1])
+    if updated_messages is None:
+        return {"messages": tool_messages(state, "active application already up to date")}
 
     # Invoke the extractor
-    active_app_extractor= create_extractor(
-      model,
-      tools=[Application],
-      tool_choice="Application",
-  )
-    result = active_app_extractor.invoke({"messages": updated_messages, 
-                                         "existing": existing_memories})
-
-    # Save the memories from Trustcall to the store
+    active_app_extractor = get_extractor(model, Application)
+    result = await scheduler.call(
+        lambda: active_app_extractor.ainvoke({"messages": updated_messages, "existing": existing_memories}),
+        model=model, priority=INTERACTIVE,
+    )
+
+    # Save each application under its own ID, so the interviews of other applications and
+    # threads are left alone, and select it for this thread
+    written = skipped = 0
     for r, rmeta in zip(result["responses"], result["response_metadata"]):
-        store.put(namespace,
-                  rmeta.get("json_doc_id", str(uuid.uuid4())),
-                  r.model_dump(mode="json"),
-            )
-    tool_calls = state['messages'][-1].tool_calls
-    return {"messages": [{"role": "tool", "content": "updated active application", "tool_call_id":tool_calls[0]['id']}]}
+        value = r.model_dump(mode="json")
+        selected_id = application_id(value, rmeta.get("json_doc_id"))
+        current = selected if selected and selected.key == selected_id else await store.aget(namespace, selected_id)
+        if current and content_hash(current.value) == content_hash(value):
+            skipped += 1
+            continue
+        await store.aput(namespace, selected_id, value)
+        await asave_digests(store, [value["posting"]])
+        written += 1
+    return {"messages": tool_messages(state, write_summary("updated active application", written, skipped)),
+            "active_application_id": selected_id}
+
+async def aget_active_application(store: BaseStore, user_id: str, selected_id: Optional[str]) -> Optional[dict]:
+    """ The application a thread selected for its interview """
+    namespace = ("active_application", user_id)
+    if selected_id:
+        item = await store.aget(namespace, selected_id)
+    else:
+        # Threads that started an interview before applications were selected by ID
+        items = await store.asearch(namespace, limit=1)
+        item = items[0] if items else None
+    return item.value if item else None
+
+# Update nodes for each UpdateMemory type
+UPDATE_NODES = {
+    "annotated_resume": "update_resume",
+    "application": "update_job_applications",
+    "document": "update_documents",
+    "instructions": "update_instructions",
+    "active_application": "begin_interview",
+}
 
 # route messages
 def route_message(
         state: ParentState, config: RunnableConfig, store: BaseStore
-    ) -> Literal[
-        END, 
-        "update_instructions", 
-        "update_job_applications", 
-        "update_resume", 
-        "update_documents",
-        "begin_interview"
-    ]:
-
-    """Reflect on the memories and chat history to decide whether to update the memory collection or begin an interview."""
+    ) -> Union[Literal[END], list[Send]]:
+
+    """Reflect on the memories and chat history to decide whether to update the memory collection or begin an interview.
+
+    Every requested update runs concurrently; calls of the same type are answered by a single node run.
+    """
     message = state['messages'][-1]
     if len(message.tool_calls) ==0:
         return END
-    else:
-        tool_call = message.tool_calls[0]
-        if tool_call['name'] == 'UpdateMemory':
-            if tool_call['args']['update_type'] == "annotated_resume":
-                return "update_resume"
-            elif tool_call['args']['update_type'] == "application":
-                return "update_job_applications"
-            elif tool_call['args']['update_type'] == "document":
-                return "update_documents"
-            elif tool_call['args']['update_type'] == "instructions":
-                return "update_instructions"
-            elif tool_call['args']['update_type'] == "active_application":
-                return "begin_interview"
-            else:
-                print(f"error: {tool_call['args']['update_type']}")
-                raise ValueError
-        else:
+
+    tool_call_ids = {}
+    for tool_call in message.tool_calls:
+        if tool_call['name'] != 'UpdateMemory':
             raise ValueError(f"error: {tool_call['args']}")
+        update_type = tool_call['args'].get('update_type')
+        if update_type not in UPDATE_NODES:
+            print(f"error: {update_type}")
+            raise ValueError
+        tool_call_ids.setdefault(UPDATE_NODES[update_type], []).append(tool_call['id'])
+
+    return [Send(node, {**state, "tool_call_ids": ids}) for node, ids in tool_call_ids.items()]
+
+# Join memory updates
+def route_update(state: ParentState) -> Literal[END, "hunter"]:
+    """ Return to hunter once the updates are done, unless an interview was started alongside them """
+    message = next(m for m in reversed(state["messages"]) if isinstance(m, AIMessage))
+    if any(tool_call['args'].get('update_type') == "active_application" for tool_call in message.tool_calls):
+        # begin_interview continues the run and returns to hunter after the interview
+        return END
+    return "hunter"
 
 # Create analysts
-def create_analysts(
+async def create_analysts(
         state: ParentState, config: RunnableConfig, store: BaseStore
     ):
     
     """ Create analysts """
     configurable = configuration.Configuration.from_runnable_config(config)
+    model = model_pool.get(configurable.model_for("analyst"))
     user_id = configurable.user_id
 
-    namespace = ("active_application", user_id)
-    memories = store.search(namespace)
-    if memories:
-        active_application = memories[0].value
-    else:
-        active_application = None
-    print(f'Active application: {active_application}')
+    # Batch runs pass the application in the state, chat runs use the one begin_interview selected
+    active_application = state.get("active_application") or await aget_active_application(
+        store, user_id, state.get("active_application_id")
+    )
     
     # job = state['active_application']['posting']
-    job = active_application['posting']
+    job = active_application.get('posting')
     # interview_notes = state['active_application']['interview_notes'] # TODO: add past interview notes to prompt
     max_analysts = state.get('max_analysts', 2)
     human_analyst_feedback = state.get('human_analyst_feedback', '')
@@ -383,21 +479,29 @@ def create_analysts(
     # Enforce structured output
     structured_llm = model.with_structured_output(Perspectives)
 
+    # The posting's requirement digest, shared by every candidate applying to it
+    requirements = render_digest(await aget_digest(store, job))
+
     # System message
     system_message = ANALYST_INSTRUCTIONS.format(
-        job=job,
+        job=requirements,
         human_analyst_feedback=human_analyst_feedback, 
         max_analysts=max_analysts
     )
 
-    # Generate question 
-    analysts = structured_llm.invoke(
-        [SystemMessage(content=system_message)]+[HumanMessage(content="Generate the set of analysts.")]
+    # Generate question (the same posting and feedback produce the same analysts, so the response is cached)
+    messages = [SystemMessage(content=system_message)]+[HumanMessage(content="Generate the set of analysts.")]
+    analysts = await response_cache.acall(
+        model, messages,
+        lambda: scheduler.call(lambda: structured_llm.ainvoke(messages), model=model, priority=BACKGROUND),
+        schema=Perspectives,
     )
     
     # Write the list of analysis to state
     return {
-        "analysts": analysts.analysts
+        "analysts": analysts.analysts,
+        "report_id": str(uuid.uuid4()),
+        "requirements": requirements,
     }
 
 # Human feedback
@@ -428,22 +532,26 @@ class InterviewState(MessagesState):
     final_report: str
     sections: Annotated[list, operator.add] # Final key we duplicate in outer state for Send() API
     max_num_turns: int # Number turns of conversation
+    tokens_used: Annotated[int, operator.add] # Tokens used by questions and answers so far
+    continue_interview: bool # Whether the last question keeps the interview going
     analyst: Analyst # Analyst asking questions
+    report_id: str # Report the section is merged into
+    report_size: int # Number of interviews of the report
+    requirements: str # Rendered requirement digest of the posting
     interview: str # Interview transcript
   
+# Closes an interview the interviewer would continue with a question not worth asking
+CLOSING_REMARK = "Thank you so much for your help!"
+
 # generate questions
-def generate_question(state: InterviewState, config: RunnableConfig, store: BaseStore):
+async def generate_question(state: InterviewState, config: RunnableConfig, store: BaseStore):
     """ Node to generate a question """
 
     configurable = configuration.Configuration.from_runnable_config(config)
+    model = model_pool.get(configurable.model_for("question"))
     user_id = configurable.user_id
 
-    namespace = ("annotated_resume", user_id)
-    memories = store.search(namespace)
-    if memories:
-        annotated_resume = memories[0].value
-    else:
-        annotated_resume = None
+    snapshot = await memory.aget_snapshot(store, user_id)
     
     # Get state
     analyst = state["analyst"]
@@ -451,18 +559,43 @@ def generate_question(state: InterviewState, config: RunnableConfig, store: Base
 
     # Generate question 
     
-    system_message = QUESTION_INSTRUCTIONS.format(
-        annotated_resume=annotated_resume,
+    requirements = state.get("requirements") or render_digest(None)
+    system_message = snapshot.render(("question", requirements, analyst.persona, configurable.memory_section_budget), lambda: QUESTION_INSTRUCTIONS.format(
+        annotated_resume=render_memory(snapshot.annotated_resume, configurable.memory_section_budget),
+        requirements=requirements,
         goals=analyst.persona,
+    ))
+    # The question comes with the interviewer's own estimate of whether it is worth asking,
+    # and is streamed once the interviewer has decided to ask it
+    min_gain = configurable.interview_min_information_gain
+    turn, raw, streamed = await scheduler.call(
+        lambda: astream_structured(
+            model, [SystemMessage(content=system_message)]+messages, InterviewTurn, "message",
+            ready=lambda partial: "message" in partial and partial.get("continue_interview") is True
+                                  and (partial.get("information_gain") or 0) >= min_gain,
+            node="ask_question", analyst=analyst.name,
+        ),
+        model=model, priority=BACKGROUND,
     )
-    question = model.invoke([SystemMessage(content=system_message)]+messages)
-    question.name = "expert"
+    continue_interview = turn is not None and turn.continue_interview and turn.information_gain >= min_gain
+    if continue_interview or (turn is not None and not turn.continue_interview):
+        # The question, or the interviewer's own closing remark
+        content = turn.message
+    else:
+        # A question not worth asking (or an unparseable turn) closes the interview instead of
+        # leaving an unanswered question in the transcript
+        content = CLOSING_REMARK
+    question = AIMessage(content=content, name="expert", id=raw.id)
+    if not streamed or not continue_interview:
+        write_message(question, node="ask_question", analyst=analyst.name)
     
     # Write messages to state
-    return {"messages": [question]}
+    return {"messages": [question],
+            "tokens_used": message_tokens(raw),
+            "continue_interview": continue_interview}
 
 # generate answer
-def generate_answer(state: InterviewState, config: RunnableConfig, store: BaseStore):
+async def generate_answer(state: InterviewState, config: RunnableConfig, store: BaseStore):
     
     """ Node to answer a question """
 
@@ -473,36 +606,31 @@ def generate_answer(state: InterviewState, config: RunnableConfig, store: BaseSt
     # context = state["context"]
 
     configurable = configuration.Configuration.from_runnable_config(config)
+    model = model_pool.get(configurable.model_for("answer"))
     user_id = configurable.user_id
 
-    namespace = ("annotated_resume", user_id)
-    memories = store.search(namespace)
-    if memories:
-        annotated_resume = memories[0].value
-    else:
-        annotated_resume = None
-
-    namespace = ("documents", user_id)
-    memories = store.search(namespace)
-    if memories:
-        documents = memories[0].value
-    else:
-        documents = None
-
+    snapshot = await memory.aget_snapshot(store, user_id)
         
+    # Retrieve the document chunks relevant to the question and the analyst's focus
+    documents = await aretrieve_documents(snapshot, f"{messages[-1].content}\n{analyst.description}", configurable)
+
     # Answer question
     system_message = ANSWER_INSTRUCTIONS.format(
         goals=analyst.persona,
-        annotated_resume=annotated_resume,
+        annotated_resume=render_memory(snapshot.annotated_resume, configurable.memory_section_budget),
         documents=documents
     )
-    answer = model.invoke([SystemMessage(content=system_message)]+messages)
+    answer = await scheduler.call(
+        lambda: astream_model(model, [SystemMessage(content=system_message)]+messages,
+                              node="answer_question", analyst=analyst.name),
+        model=model, priority=BACKGROUND,
+    )
             
     # Name the message as coming from the candidate
     answer.name = "candidate"
     
     # Append it to state
-    return {"messages": [answer]}
+    return {"messages": [answer], "tokens_used": message_tokens(answer)}
 
 # save interview
 def save_interview(state: InterviewState):
@@ -518,8 +646,16 @@ def save_interview(state: InterviewState):
     # Save to interviews key
     return {"interview": interview}
 
-# conditional edge
-def route_messages(state: InterviewState, 
+# conditional edges
+def route_question(state: InterviewState):
+
+    """ Skip the answer when the interviewer closed the interview """
+
+    if not state.get("continue_interview", True):
+        return 'save_interview'
+    return "answer_question"
+
+def route_messages(state: InterviewState, config: RunnableConfig,
                    name: str = "expert"):
 
     """ Route between question and answer """
@@ -537,11 +673,9 @@ def route_messages(state: InterviewState,
     if num_responses >= max_num_turns:
         return 'save_interview'
 
-    # This router is run after each question - answer pair 
-    # Get the last question asked to check if it signals the end of discussion
-    last_question = messages[-2]
-    
-    if "Thank you so much for your help" in last_question.content:
+    # End once the interview has used its token budget
+    token_budget = configuration.Configuration.from_runnable_config(config).interview_token_budget
+    if token_budget and state.get("tokens_used", 0) >= token_budget:
         return 'save_interview'
     return "ask_question"
 
@@ -560,33 +694,58 @@ def route_messages(state: InterviewState,
 # }
 
 # write sections
-def write_section(state: InterviewState):
+async def write_section(state: InterviewState, config: RunnableConfig):
     """ Node to answer a question """
+    configurable = configuration.Configuration.from_runnable_config(config)
+    model = model_pool.get(configurable.model_for("report"))
 
     # Get state
     interview = state["interview"]
     analyst = state["analyst"]
     # focus_instructions = FOCUS_INSTRUCTIONS[focus]
     # Write section using either the gathered source docs from interview (context) or the interview itself (interview)
-    system_message = SECTION_WRITER_INSTRUCTIONS.format()
-    section = model.invoke([SystemMessage(content=system_message)]+[HumanMessage(content=f"Here's the interview transpcript:\n{interview}")]) 
+    system_message = SECTION_WRITER_INSTRUCTIONS.format(requirements=state.get("requirements") or render_digest(None))
+    messages = [SystemMessage(content=system_message)]+[HumanMessage(content=f"Here's the interview transpcript:\n{interview}")]
+    section = await response_cache.acall(
+        model, messages,
+        lambda: scheduler.call(
+            lambda: astream_model(model, messages, node="write_section", analyst=analyst.name),
+            model=model, priority=BACKGROUND,
+        ),
+        on_hit=lambda message: write_message(message, node="write_section", analyst=analyst.name),
+    )
                 
     # Append it to state
-    print(section.content)
     return {"sections": [section.content]} 
 
 # finalize interview
-def finalize_interview(state: ParentState):
+async def finalize_interview(state: ParentState, config: RunnableConfig):
     """ The is the "reduce" step where we gather all the sections, combine them, and reflect on them to write the final interview report. """
+    configurable = configuration.Configuration.from_runnable_config(config)
+    model = model_pool.get(configurable.model_for("report"))
     # Save full final report
 
-    sections = state["sections"]
+    # Reconcile the running draft with the sections of the interviews that finished last,
+    # when the draft has every section of this report
+    draft = report_drafts.pop(state.get("report_id"))
+    if draft is not None and draft.merged and len(draft.sections) == len(state.get("analysts") or []):
+        sections = [f"Report written from the earlier memos:\n{draft.text}", *draft.pending]
+    else:
+        sections = state["sections"]
     formatted_str_sections = "\n\n".join([f"{section}" for section in sections])
     
     # Summarize the sections into a final report
     
     instructions = FINALIZE_INTERVIEW_INSTRUCTIONS.format(sections=formatted_str_sections)
-    final_report = model.invoke([instructions]+[HumanMessage(content=f"Write the report conclusion")]) 
+    messages = [instructions]+[HumanMessage(content=f"Write the report conclusion")]
+    final_report = await response_cache.acall(
+        model, messages,
+        lambda: scheduler.call(
+            lambda: astream_model(model, messages, node="finalize_interview"),
+            model=model, priority=BACKGROUND,
+        ),
+        on_hit=lambda message: write_message(message, node="finalize_interview"),
+    )
     return {"final_report": final_report}
 
 interview_builder = StateGraph(InterviewState)
@@ -596,11 +755,42 @@ interview_builder.add_node(save_interview)
 interview_builder.add_node(write_section)
 
 interview_builder.add_edge(START, "ask_question")
-interview_builder.add_edge("ask_question", "answer_question")
+interview_builder.add_conditional_edges("ask_question", route_question, ['answer_question', 'save_interview'])
 interview_builder.add_conditional_edges("answer_question", route_messages,['ask_question','save_interview'])
 interview_builder.add_edge("save_interview", "write_section")
 interview_builder.add_edge("write_section", END)
 
+interview_graph = interview_builder.compile()
+
+# Conduct interview
+async def conduct_interview(state: InterviewState, config: RunnableConfig):
+    """ Run an interview once the scheduler admits it, forwarding its token stream to the parent graph's stream """
+    configurable = configuration.Configuration.from_runnable_config(config)
+    writer = get_stream_writer()
+    output = {}
+    async with scheduler.interview(configurable.user_id):
+        async for mode, chunk in interview_graph.astream(state, config, stream_mode=["custom", "values"]):
+            if mode == "custom":
+                writer(chunk)
+            else:
+                output = chunk
+
+    # Merge the section into the running report while the other interviews go on
+    if configurable.pipeline_report and state.get("report_id"):
+        model = model_pool.get(configurable.model_for("report"))
+        await report_drafts.add(
+            state["report_id"], output.get("sections", []), state.get("report_size", 1),
+            lambda draft, section: merge_section(model, draft, section),
+        )
+    return {"messages": output.get("messages", []), "sections": output.get("sections", [])}
+
+async def merge_section(model, draft: str, section: str) -> str:
+    """ Fold one analyst's section into the running report draft """
+    instructions = MERGE_SECTION_INSTRUCTIONS.format(draft=draft or "(empty)", section=section)
+    messages = [SystemMessage(content=instructions)]+[HumanMessage(content="Write the updated report")]
+    response = await scheduler.call(lambda: model.ainvoke(messages), model=model, priority=BACKGROUND)
+    return response.content
+
 # across_thread_memory = InMemoryStore()
 # memory = MemorySaver()
 # interview_graph = interview_builder.compile(
@@ -624,6 +814,9 @@ def initiate_all_interviews(state: ParentState):
     else:
         # topic = state["topic"]
         return [Send("conduct_interview", {"analyst": analyst,
+                                           "report_id": state.get("report_id"),
+                                           "report_size": len(state["analysts"]),
+                                           "requirements": state.get("requirements"),
                                            "messages": [HumanMessage(
                                                content=f"Let's begin the interview."
                                            )
@@ -632,6 +825,8 @@ def initiate_all_interviews(state: ParentState):
 builder = StateGraph(ParentState, config_schema=configuration.Configuration)
 
 # Define the flow of the memory extraction process
+builder.add_node(fast_route)
+builder.add_node(summarize_history)
 builder.add_node(hunter)
 builder.add_node(update_resume)
 builder.add_node(update_job_applications)
@@ -640,26 +835,70 @@ builder.add_node(update_instructions)
 builder.add_node(begin_interview)
 builder.add_node(create_analysts) 
 builder.add_node(human_feedback)
-builder.add_node("conduct_interview", interview_builder.compile())
+builder.add_node(conduct_interview)
 builder.add_node(finalize_interview)
 
-builder.add_edge(START, "hunter")
-builder.add_conditional_edges("hunter", route_message)
-builder.add_edge("update_resume", "hunter")
-builder.add_edge("update_job_applications", "hunter")
-builder.add_edge("update_documents", "hunter")
-builder.add_edge("update_instructions", "hunter")
+builder.add_edge(START, "fast_route")
+builder.add_conditional_edges("fast_route", route_fast, [END, "summarize_history", "begin_interview"])
+builder.add_edge("summarize_history", "hunter")
+builder.add_conditional_edges("hunter", route_message, [END, *UPDATE_NODES.values()])
+builder.add_conditional_edges("update_resume", route_update)
+builder.add_conditional_edges("update_job_applications", route_update)
+builder.add_conditional_edges("update_documents", route_update)
+builder.add_conditional_edges("update_instructions", route_update)
 builder.add_edge("begin_interview", "create_analysts")
 builder.add_edge("create_analysts", "human_feedback")
 builder.add_conditional_edges("human_feedback", initiate_all_interviews, ["create_analysts", "conduct_interview"])
 builder.add_edge("conduct_interview", "finalize_interview")
-builder.add_edge("finalize_interview", "hunter")
+builder.add_edge("finalize_interview", "summarize_history")
+
+# Deployment-level configuration (read from the environment)
+deployment_config = configuration.Configuration.from_runnable_config()
 
 # Store for long-term (across-thread) memory
-across_thread_memory = InMemoryStore()
+if deployment_config.store_backend == "sqlite":
+    across_thread_memory = SqliteStore(deployment_config.store_path)
+elif deployment_config.store_backend == "memory":
+    across_thread_memory = InMemoryStore()
+else:
+    raise ValueError(f"Unknown store backend: {deployment_config.store_backend}")
 
 # Checkpointer for short-term (within-thread) memory
-within_thread_memory = MemorySaver()
+if deployment_config.checkpointer_backend == "sqlite":
+    within_thread_memory = SqliteCheckpointer(
+        deployment_config.checkpointer_path,
+        retention=deployment_config.checkpoint_retention,
+    )
+elif deployment_config.checkpointer_backend == "memory":
+    within_thread_memory = MemorySaver()
+else:
+    raise ValueError(f"Unknown checkpointer backend: {deployment_config.checkpointer_backend}")
+
+# Admission control for model calls and interviews, shared by every run in this process
+scheduler = Scheduler.from_configuration(deployment_config)
+
+# Opt-in cache of analyst, section and report responses (disabled without a path)
+response_cache = ResponseCache(
+    deployment_config.response_cache_path or None,
+    ttl=deployment_config.response_cache_ttl,
+    max_entries=deployment_config.response_cache_max_entries,
+)
+
+# Local pre-classifier for the fast path (enabled per run with fast_path)
+fast_router = FastRouter(
+    threshold=deployment_config.fast_path_threshold,
+    shadow_rate=deployment_config.fast_path_shadow_rate,
+)
+
+# Running report drafts, merged as each interview finishes
+report_drafts = ReportDrafts()
+
+# Per-node latency, token and store metrics for the graph and the interview subgraph
+graph_metrics = GraphMetrics(nodes=[*builder.nodes, *interview_builder.nodes])
+if deployment_config.metrics_port:
+    serve_metrics(graph_metrics, deployment_config.metrics_port, collectors=[fast_router, response_cache])
 
 # We compile the graph with the checkpointer and store
-graph = builder.compile(checkpointer=within_thread_memory, store=across_thread_memory)
+graph = builder.compile(
+    checkpointer=within_thread_memory, store=InstrumentedStore(across_thread_memory, graph_metrics)
+).with_config(callbacks=[graph_metrics])
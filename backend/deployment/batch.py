@@ -0,0 +1,146 @@
+"""Run interviews for many applications in one offline run, without human-in-the-loop review.
+
+Each line of the jobs file is a JSON object with a `user_id` (or a list of `user_ids`) and
+an `application` (an Application, or just a JobPosting under `posting`):
+
+    {"id": "acme-de", "user_ids": ["jane", "john"], "posting": {"job_title": "Data Engineer", ...}}
+
+Every (user, application) pair runs create_analysts -> conduct_interview -> finalize_interview
+against the deployment's store, so the users' resumes and documents must be in a persistent
+store (STORE_BACKEND=sqlite); the command refuses to run with the in-memory store. One JSON
+line per finished job is appended to the results file. Re-running the same command skips the
+jobs already in the results file and resumes interrupted jobs from their last checkpoint.
+
+    python batch.py jobs.jsonl results.jsonl --concurrency 4 --analysts 3
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from typing import Iterable
+
+from langgraph.graph import END, START, StateGraph
+from langgraph.store.memory import InMemoryStore
+
+import agent
+import configuration
+from schema import Application
+from sqlite_checkpointer import SqliteCheckpointer
+
+logger = logging.getLogger(__name__)
+
+
+def batch_graph(checkpointer):
+    """The interview part of the hunter graph, with analysts approved as created."""
+    builder = StateGraph(agent.ParentState, config_schema=configuration.Configuration)
+    builder.add_node(agent.create_analysts)
+    builder.add_node(agent.conduct_interview)
+    builder.add_node(agent.finalize_interview)
+    builder.add_edge(START, "create_analysts")
+    builder.add_conditional_edges("create_analysts", agent.initiate_all_interviews, ["conduct_interview"])
+    builder.add_edge("conduct_interview", "finalize_interview")
+    builder.add_edge("finalize_interview", END)
+    return builder.compile(checkpointer=checkpointer, store=agent.across_thread_memory)
+
+
+def load_jobs(path: str) -> list[dict]:
+    """Expand the jobs file into one job per (user, application) pair."""
+    jobs = []
+    with open(path) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            application = record.get("application") or {"posting": record["posting"]}
+            application = Application.model_validate(application).model_dump(mode="json")
+            for user_id in record.get("user_ids") or [record["user_id"]]:
+                digest = hashlib.sha1(json.dumps([user_id, application], sort_keys=True).encode()).hexdigest()[:16]
+                job_id = f"{record['id']}:{user_id}" if record.get("id") else digest
+                jobs.append({"id": job_id, "user_id": user_id, "application": application})
+    return jobs
+
+
+def finished_jobs(path: str) -> set[str]:
+    if not os.path.exists(path):
+        return set()
+    with open(path) as f:
+        return {json.loads(line)["id"] for line in f if line.strip()}
+
+
+async def run_job(graph, job: dict, args) -> dict:
+    config = {"configurable": {"thread_id": f"batch-{job['id']}", "user_id": job["user_id"]}}
+    start = time.perf_counter()
+
+    # Resume from the last checkpoint of an interrupted run, or reuse a finished one whose result was not written
+    snapshot = await graph.aget_state(config)
+    if snapshot.next:
+        state = await graph.ainvoke(None, config)
+    elif snapshot.values.get("final_report"):
+        state = snapshot.values
+    else:
+        state = await graph.ainvoke({
+            "messages": [],
+            "active_application": job["application"],
+            "max_analysts": args.analysts,
+        }, config)
+
+    posting = job["application"]["posting"]
+    return {
+        "id": job["id"],
+        "user_id": job["user_id"],
+        "job_title": posting.get("job_title"),
+        "company": (posting.get("company") or {}).get("name"),
+        "analysts": [analyst.name for analyst in state["analysts"]],
+        "report": state["final_report"].content,
+        "seconds": round(time.perf_counter() - start, 2),
+    }
+
+
+async def run_batch(jobs: Iterable[dict], results_path: str, args) -> int:
+    """Run the jobs not yet in the results file. Returns the number of failed jobs."""
+    done = finished_jobs(results_path)
+    pending = [job for job in jobs if job["id"] not in done]
+    logger.info("%d jobs to run, %d already done", len(pending), len(done))
+
+    graph = batch_graph(SqliteCheckpointer(args.checkpoints))
+    semaphore = asyncio.Semaphore(args.concurrency)
+    write_lock = asyncio.Lock()
+    failed = 0
+
+    async def run(job: dict) -> None:
+        nonlocal failed
+        async with semaphore:
+            try:
+                result = await run_job(graph, job, args)
+            except Exception:
+                # Left out of the results so the next run retries it
+                logger.exception("job %s failed", job["id"])
+                failed += 1
+                return
+        async with write_lock:
+            with open(results_path, "a") as f:
+                f.write(json.dumps(result) + "\n")
+        logger.info("job %s done in %.1fs", job["id"], result["seconds"])
+
+    await asyncio.gather(*(run(job) for job in pending))
+    return failed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("jobs", help="JSONL file of applications and user IDs")
+    parser.add_argument("results", help="JSONL file the reports are appended to")
+    parser.add_argument("--concurrency", type=int, default=4, help="jobs run at the same time")
+    parser.add_argument("--analysts", type=int, default=2, help="analysts per interview")
+    parser.add_argument("--checkpoints", default="batch_checkpoints.sqlite", help="checkpoint file used to resume jobs")
+    args = parser.parse_args()
+    if isinstance(agent.across_thread_memory, InMemoryStore):
+        # Every job would run against an empty store and be recorded as done
+        parser.error("batch mode reads resumes and documents from a persistent store, set STORE_BACKEND=sqlite and STORE_PATH")
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    failed = asyncio.run(run_batch(load_jobs(args.jobs), args.results, args))
+    raise SystemExit(1 if failed else 0)
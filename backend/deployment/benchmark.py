@@ -0,0 +1,210 @@
+"""Benchmark the hunter graph against a scripted fake model.
+
+Runs representative workloads through `agent.builder` with every pooled model answered by
+FakeChatModel, so the numbers measure the graph's own overhead (store, checkpointer,
+prompt rendering, state handling) rather than the LLM API.
+
+    python benchmark.py --runs 20 --concurrency 4 --analysts 3
+    python benchmark.py --workload interview --latency 0.2 --json results.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import time
+import tracemalloc
+import uuid
+from collections import Counter
+from typing import Iterable
+
+import agent
+from fake_model import FakeChatModel
+from models import ModelPool
+from langchain_core.messages import HumanMessage
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.store.base import BaseStore, Op, Result
+from langgraph.store.memory import InMemoryStore
+from sqlite_checkpointer import SqliteCheckpointer
+from sqlite_store import SqliteStore
+
+RESUME = (
+    "Here is my resume. Jane Doe, jane@example.com. B.S. Computer Science, State University, 2022. "
+    "Software Engineer at Acme Corp since 2022: built data pipelines in Python and SQL, "
+    "cut report latency by 40%. Skills: Python, SQL, AWS, Docker. Fluent in Spanish."
+)
+DOCUMENTS = (
+    "Please save my cover letter and my project write-up for later. "
+    "The cover letter explains why I want to move into machine learning engineering."
+)
+APPLICATIONS = [
+    "I applied to a Data Engineer position at Globex yesterday.",
+    "Globex scheduled an interview with me for next week.",
+    "I also started an application for a Backend Engineer role at Initech.",
+]
+INTERVIEW = "Please attend the interview for the Globex Data Engineer role for me."
+
+# Human messages sent on one thread per run, in order
+WORKLOADS = {
+    "onboarding": [RESUME, DOCUMENTS],
+    "applications": APPLICATIONS,
+    "interview": [INTERVIEW],
+}
+
+# UpdateMemory calls the fake model makes for each message
+UPDATES = {
+    RESUME: ["annotated_resume"],
+    DOCUMENTS: ["document"],
+    **{message: ["application"] for message in APPLICATIONS},
+    INTERVIEW: ["active_application"],
+}
+
+
+class CountingStore(BaseStore):
+    """Store wrapper that counts the operations passed to the wrapped store."""
+
+    def __init__(self, store: BaseStore):
+        self.store = store
+        self.ops = Counter()
+
+    def _count(self, ops: Iterable[Op]) -> list[Op]:
+        ops = list(ops)
+        self.ops.update(type(op).__name__ for op in ops)
+        return ops
+
+    def batch(self, ops: Iterable[Op]) -> list[Result]:
+        return self.store.batch(self._count(ops))
+
+    async def abatch(self, ops: Iterable[Op]) -> list[Result]:
+        return await self.store.abatch(self._count(ops))
+
+
+def fake_model(args) -> FakeChatModel:
+    analysts = [
+        {
+            "name": f"Analyst {i}",
+            "role": f"Interviewer {i}",
+            "description": f"Focuses on area {i} of the job requirements.",
+        }
+        for i in range(1, args.analysts + 1)
+    ]
+    posting = {
+        "job_title": "Data Engineer",
+        "company": {"name": "Globex", "location": "Remote", "industry": "Software"},
+        "job_description": "Build and maintain data pipelines.",
+        "qualifications": ["Python", "SQL", "Cloud data warehouses"],
+        "responsibilities": ["Own the ingestion pipelines", "Support analytics teams"],
+    }
+    return FakeChatModel(
+        latency=args.latency,
+        response_tokens=args.tokens,
+        updates=UPDATES,
+        tool_args={
+            "Perspectives": {"analysts": analysts},
+            "Application": {"posting": posting, "status": "Interview Scheduled"},
+            "InterviewTurn": {
+                "continue_interview": True,
+                "information_gain": 0.5,
+                "message": "Tell me about a data pipeline you built.",
+            },
+        },
+    )
+
+
+def build_graph(args, workdir: str):
+    if args.store == "sqlite":
+        store = SqliteStore(os.path.join(workdir, "bench_store.sqlite"))
+    else:
+        store = InMemoryStore()
+    if args.checkpointer == "sqlite":
+        checkpointer = SqliteCheckpointer(os.path.join(workdir, "bench_checkpoints.sqlite"))
+    else:
+        checkpointer = MemorySaver()
+    store = CountingStore(store)
+    return agent.builder.compile(checkpointer=checkpointer, store=store), store
+
+
+async def run_thread(graph, messages: list[str], user_id: str) -> list[float]:
+    """Send each message on a fresh thread, consuming the stream like a client. Returns turn latencies."""
+    config = {"configurable": {"thread_id": str(uuid.uuid4()), "user_id": user_id}}
+    latencies = []
+    for message in messages:
+        start = time.perf_counter()
+        async for _ in graph.astream(
+            {"messages": [HumanMessage(content=message)]}, config, stream_mode=["values", "custom"]
+        ):
+            pass
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+async def run_workload(name: str, args, workdir: str) -> dict:
+    graph, store = build_graph(args, workdir)
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def run(i: int) -> list[float]:
+        async with semaphore:
+            return await run_thread(graph, WORKLOADS[name], f"bench-{name}-{i}")
+
+    # Warm up imports, compiled prompts and extractors outside the measurement
+    await run(-1)
+    store.ops.clear()
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    results = await asyncio.gather(*(run(i) for i in range(args.runs)))
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    latencies = sorted(latency for result in results for latency in result)
+    turns = len(latencies)
+    return {
+        "workload": name,
+        "runs": args.runs,
+        "turns": turns,
+        "throughput": turns / elapsed,
+        "p50_ms": 1000 * statistics.median(latencies),
+        "p99_ms": 1000 * latencies[min(turns - 1, int(0.99 * turns))],
+        "store_ops_per_turn": {op: count / turns for op, count in sorted(store.ops.items())},
+        "peak_memory_mb": peak / 2**20,
+    }
+
+
+def print_results(results: list[dict]) -> None:
+    print(f"{'workload':<14}{'turns':>7}{'turns/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'peak MB':>10}  store ops/turn")
+    for r in results:
+        ops = ", ".join(f"{op.removesuffix('Op').lower()}={n:.1f}" for op, n in r["store_ops_per_turn"].items())
+        print(
+            f"{r['workload']:<14}{r['turns']:>7}{r['throughput']:>10.1f}{r['p50_ms']:>10.1f}"
+            f"{r['p99_ms']:>10.1f}{r['peak_memory_mb']:>10.1f}  {ops}"
+        )
+
+
+async def main(args) -> list[dict]:
+    model = fake_model(args)
+    agent.model_pool = ModelPool(lambda name: model)
+    workdir = args.workdir or os.getcwd()
+    names = list(WORKLOADS) if args.workload == "all" else [args.workload]
+    return [await run_workload(name, args, workdir) for name in names]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workload", choices=["all", *WORKLOADS], default="all")
+    parser.add_argument("--runs", type=int, default=10, help="threads per workload")
+    parser.add_argument("--concurrency", type=int, default=4, help="threads run at the same time")
+    parser.add_argument("--analysts", type=int, default=2, help="analysts per interview")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds per fake model call")
+    parser.add_argument("--tokens", type=int, default=50, help="words per fake text response")
+    parser.add_argument("--store", choices=["memory", "sqlite"], default="memory")
+    parser.add_argument("--checkpointer", choices=["memory", "sqlite"], default="memory")
+    parser.add_argument("--workdir", help="directory for sqlite files (default: current directory)")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    results = asyncio.run(main(args))
+    print_results(results)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
@@ -13,8 +13,93 @@ class Configuration:
     # todo_category: str = "general" 
     hunter_role: str = "You are designed to be a companion to a user, helping them build and manage a profile of their professional and academic career and manage job applications in order to attend job interviews in the user's stead."
 
+    # Default chat model, and optional per-stage models (empty uses the default): hunter
+    # routing, memory updates and history summaries, analyst creation, interview questions,
+    # interview answers, and the section and final reports
+    model: str = "gpt-4o-mini"
+    hunter_model: str = ""
+    memory_model: str = ""
+    analyst_model: str = ""
+    question_model: str = ""
+    answer_model: str = ""
+    report_model: str = ""
+
+    # Long-term memory store backend: "memory" (process-local) or "sqlite" (durable, shareable between workers)
+    store_backend: str = "memory"
+    store_path: str = "hunter_store.sqlite"
+
+    # Checkpointer backend: "memory" (process-local) or "sqlite" (durable, delta-encoded)
+    checkpointer_backend: str = "memory"
+    checkpointer_path: str = "hunter_checkpoints.sqlite"
+    # Number of checkpoints kept per thread by the sqlite checkpointer (0 keeps all)
+    checkpoint_retention: int = 0
+
+    # How the memory update nodes read the chat history: "incremental" sends only messages
+    # not yet reflected into that memory, "full" sends the whole thread every time. The active
+    # application of an interview is always extracted from the whole thread
+    memory_update_mode: str = "incremental"
+    # Number of earlier messages summarized as context in incremental mode
+    memory_context_window: int = 4
+
+    # Approximate tokens of chat history hunter sends before older messages are folded
+    # into a rolling summary (0 always sends the full history)
+    history_token_budget: int = 8000
+
+    # Maximum characters of each memory section (e.g. a resume's experience) rendered into
+    # prompts, longer sections are truncated (0 renders every section in full)
+    memory_section_budget: int = 0
+
+    # Number of document chunks retrieved into prompts (0 includes every document in full)
+    document_retrieval_k: int = 5
+    # Target length of a document chunk in characters
+    document_chunk_size: int = 1000
+    # Optional local sentence-transformers model used alongside BM25 to rank chunks
+    document_embedding_model: str = ""
+
+    # Process-wide limits on model calls (0 disables a limit). Interactive hunter turns are
+    # admitted before background interview calls, and 429s are retried with backoff
+    max_concurrent_model_calls: int = 16
+    model_requests_per_second: float = 0.0
+    model_burst: int = 10
+    model_max_retries: int = 5
+    # Interviews run at once across all users and for a single user (0 disables a limit)
+    max_concurrent_interviews: int = 8
+    max_user_interviews: int = 2
+
+    # Optional SQLite file caching analyst, section and report responses, so re-running an
+    # interview with unchanged inputs does not call the model again (empty disables the cache)
+    response_cache_path: str = ""
+    # Seconds a cached response stays valid (0 keeps it until evicted) and maximum entries kept
+    response_cache_ttl: float = 7 * 24 * 3600
+    response_cache_max_entries: int = 10000
+
+    # An interview stops early once the interviewer expects less than
+    # interview_min_information_gain from its next question, or once its questions and
+    # answers have used interview_token_budget tokens (0 disables the budget)
+    interview_min_information_gain: float = 0.2
+    interview_token_budget: int = 20000
+
+    # Merge each interview's section into a running report while the other interviews are
+    # still running, so the final step only reconciles the last sections with it. Pays off
+    # when interview lengths are uneven; each merge is an extra report-sized call
+    pipeline_report: bool = False
+
+    # Route acknowledgements and interview requests with a local classifier instead of the
+    # hunter LLM when it is at least fast_path_threshold confident. A fast_path_shadow_rate
+    # fraction of those turns still go to hunter to measure the classifier's accuracy
+    fast_path: bool = False
+    fast_path_threshold: float = 0.9
+    fast_path_shadow_rate: float = 0.05
+
+    # Port serving Prometheus metrics on /metrics and recent run summaries on /runs (0 disables)
+    metrics_port: int = 0
+
     # task_maistro_role: str = "You are a helpful task management assistant. You help you create, organize, and manage the user's ToDo list."
 
+    def model_for(self, stage: str) -> str:
+        """Name of the model assigned to a stage, falling back to the default model."""
+        return getattr(self, f"{stage}_model") or self.model
+
     @classmethod
     def from_runnable_config(
         cls, config: Optional[RunnableConfig] = None
@@ -28,4 +113,16 @@ class Configuration:
             for f in fields(cls)
             if f.init
         }
-        return cls(**{k: v for k, v in values.items() if v})
\ No newline at end of file
+        types = {f.name: f.type for f in fields(cls)}
+        return cls(**{k: _coerce(v, types[k]) for k, v in values.items() if v not in (None, "")})
+
+
+def _coerce(value: Any, type_: Any) -> Any:
+    """Convert values read from the environment to the field's type."""
+    if not isinstance(value, str):
+        return value
+    if type_ is bool:
+        return value.lower() in ("1", "true", "yes", "on")
+    if type_ in (int, float):
+        return type_(value)
+    return value
\ No newline at end of file
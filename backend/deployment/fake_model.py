@@ -0,0 +1,169 @@
+import asyncio
+import json
+import re
+import time
+import uuid
+from typing import Any, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage, HumanMessage
+from langchain_core.messages.utils import count_tokens_approximately
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+# Ids of the documents Trustcall lists as existing in its system message
+EXISTING_PATTERN = re.compile(r"<instance id=([^\s>]+)")
+
+# Characters of tool call arguments per streamed chunk
+TOOL_ARGS_CHUNK = 16
+
+
+class FakeChatModel(BaseChatModel):
+    """Deterministic stand-in for ChatOpenAI that answers from a script instead of an API.
+
+    Text responses are `response_tokens` words long and take `latency` seconds, spread over
+    the streamed tokens. Tool calls follow the bound tools:
+
+    - `UpdateMemory` is called with the update types listed in `updates` for the latest
+      human message, so a workload decides which memory nodes each turn reaches.
+    - Trustcall's `PatchDoc` patches the first existing document without changing it.
+    - Any other tool is called with `tool_args[name]`, or with placeholder arguments
+      generated from its JSON schema.
+
+    Args:
+        latency: Seconds each model call takes
+        response_tokens: Number of words in a text response
+        updates: Update types called by the agent, keyed by human message content
+        tool_args: Arguments returned for a tool, keyed by tool name
+    """
+
+    latency: float = 0.0
+    response_tokens: int = 50
+    updates: dict[str, list[str]] = {}
+    tool_args: dict[str, dict] = {}
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat-model"
+
+    def bind_tools(self, tools, *, tool_choice: Optional[str] = None, **kwargs: Any):
+        return self.bind(
+            tools=[convert_to_openai_tool(tool) for tool in tools],
+            tool_choice=tool_choice,
+            **kwargs,
+        )
+
+    def _generate(self, messages: list[BaseMessage], stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        time.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=self._respond(messages, **kwargs))])
+
+    async def _agenerate(self, messages: list[BaseMessage], stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        await asyncio.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=self._respond(messages, **kwargs))])
+
+    async def _astream(self, messages: list[BaseMessage], stop=None, run_manager=None, **kwargs: Any):
+        message = self._respond(messages, **kwargs)
+        if message.tool_calls:
+            await asyncio.sleep(self.latency)
+            # Arguments arrive in pieces, as from the API; name and id come with the first one
+            for i, tc in enumerate(message.tool_calls):
+                args = json.dumps(tc["args"])
+                for start in range(0, len(args), TOOL_ARGS_CHUNK):
+                    first = start == 0
+                    yield ChatGenerationChunk(message=AIMessageChunk(
+                        content="",
+                        id=message.id,
+                        usage_metadata=message.usage_metadata if first and i == 0 else None,
+                        tool_call_chunks=[{
+                            "name": tc["name"] if first else None,
+                            "args": args[start:start + TOOL_ARGS_CHUNK],
+                            "id": tc["id"] if first else None,
+                            "index": i,
+                        }],
+                    ))
+            return
+
+        words = message.content.split(" ")
+        for i, word in enumerate(words):
+            await asyncio.sleep(self.latency / len(words))
+            last = i == len(words) - 1
+            chunk = ChatGenerationChunk(message=AIMessageChunk(
+                content=word if last else f"{word} ",
+                id=message.id,
+                # Usage arrives with the last chunk, as with stream_usage=True
+                usage_metadata=message.usage_metadata if last else None,
+            ))
+            if run_manager:
+                await run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+
+    def _respond(self, messages: list[BaseMessage], tools: Optional[list[dict]] = None,
+                 tool_choice: Optional[str] = None, **kwargs: Any) -> AIMessage:
+        tools = {tool["function"]["name"]: tool["function"] for tool in tools or []}
+        tool_calls = []
+
+        if "UpdateMemory" in tools:
+            if isinstance(messages[-1], HumanMessage):
+                tool_calls = [
+                    _tool_call("UpdateMemory", {"update_type": update_type})
+                    for update_type in self.updates.get(str(messages[-1].content), [])
+                ]
+        elif tools:
+            existing = EXISTING_PATTERN.findall(str(messages[0].content))
+            if existing and "PatchDoc" in tools:
+                name = "PatchDoc"
+                args = {"json_doc_id": existing[0], "planned_edits": "No changes needed", "patches": []}
+            else:
+                name = tool_choice if tool_choice in tools else next(n for n in tools if n != "PatchDoc")
+                args = self.tool_args.get(name) or _placeholder(tools[name]["parameters"])
+            tool_calls = [_tool_call(name, args)]
+
+        content = "" if tool_calls else " ".join(
+            f"token{i}" for i in range(self.response_tokens)
+        )
+        input_tokens = count_tokens_approximately(messages)
+        output_tokens = count_tokens_approximately([AIMessage(content=content, tool_calls=tool_calls)])
+        return AIMessage(
+            content=content,
+            tool_calls=tool_calls,
+            id=f"run-{uuid.uuid4()}",
+            usage_metadata={
+                "input_tokens": input_tokens,
+                "output_tokens": output_tokens,
+                "total_tokens": input_tokens + output_tokens,
+            },
+        )
+
+
+def _tool_call(name: str, args: dict) -> dict:
+    return {"name": name, "args": args, "id": f"call_{uuid.uuid4().hex[:24]}", "type": "tool_call"}
+
+
+def _placeholder(schema: dict, definitions: Optional[dict] = None) -> Any:
+    """Build the smallest value that satisfies a JSON schema, filling in every property."""
+    definitions = definitions if definitions is not None else schema.get("$defs", {})
+    if "$ref" in schema:
+        return _placeholder(definitions[schema["$ref"].split("/")[-1]], definitions)
+    if "anyOf" in schema:
+        option = next((s for s in schema["anyOf"] if s.get("type") != "null"), schema["anyOf"][0])
+        return _placeholder(option, definitions)
+    if "enum" in schema:
+        return schema["enum"][0]
+
+    type_ = schema.get("type", "object")
+    if type_ == "object":
+        return {
+            name: _placeholder(prop, definitions)
+            for name, prop in schema.get("properties", {}).items()
+        }
+    if type_ == "array":
+        return [_placeholder(schema.get("items", {}), definitions)]
+    if type_ in ("integer", "number"):
+        return 1
+    if type_ == "boolean":
+        return False
+    if type_ == "null":
+        return None
+    if schema.get("format") == "date":
+        return "2025-01-01"
+    return "placeholder"
@@ -0,0 +1,295 @@
+import threading
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional
+
+from langgraph.store.base import BaseStore, GetOp, PutOp, SearchOp
+
+from utils import content_hash
+
+# Namespaces that make up a user's long-term memory
+MEMORY_NAMESPACES = (
+    "annotated_resume",
+    "instructions",
+    "applications",
+    "documents",
+)
+
+# Collections stored one item per list entry: namespace name -> list field of the collection.
+# The collection's other fields and the order of its items live in an index item, so adding or
+# changing one entry writes that entry and (if the order changed) the index, not the whole list
+COLLECTIONS = {
+    "applications": "applications",
+    "documents": "documents",
+}
+INDEX_KEY = "index"
+ITEMS_NAMESPACE = "items"
+
+# Items read per search of a collection; larger collections are read page by page
+COLLECTION_PAGE_SIZE = 1000
+
+# Version stamp written whenever one of the memory namespaces changes
+VERSION_NAMESPACE = "memory_version"
+VERSION_KEY = "version"
+
+
+@dataclass
+class MemorySnapshot:
+    """ Point-in-time view of a user's long-term memory """
+    user_id: str
+    version: str
+    annotated_resume: Optional[dict] = None
+    instructions: Optional[dict] = None
+    applications: Optional[dict] = None
+    documents: Optional[dict] = None
+    _derived: dict = field(default_factory=dict, repr=False)
+
+    def memo(self, key: Any, build: Callable[[], Any]) -> Any:
+        """Return a value derived from this snapshot, building it only once per version."""
+        value = self._derived.get(key)
+        if value is None:
+            value = self._derived.setdefault(key, build())
+        return value
+
+    def render(self, key: Any, build: Callable[[], str]) -> str:
+        """Return a prompt rendered from this snapshot, building it only once per version."""
+        return self.memo(("render", key), build)
+
+
+class SnapshotCache:
+    """Process-local cache of memory snapshots, validated against the version stamp in the store.
+
+    Reading a cached snapshot costs a single `store.get` of the version stamp instead of one
+    search per namespace. Writers must call `invalidate` after their `store.put` so that every
+    worker sharing the store picks up the new version on its next read.
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self._snapshots: OrderedDict[str, MemorySnapshot] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, store: BaseStore, user_id: str) -> MemorySnapshot:
+        stamp = store.get((VERSION_NAMESPACE, user_id), VERSION_KEY)
+        # No stamp on the first read for this user (or data written before stamps existed)
+        version = stamp.value["version"] if stamp else self.invalidate(store, user_id)
+        snapshot = self._cached(user_id, version)
+        if snapshot is None:
+            results = [
+                read_collection(store, (name, user_id), items) if name in COLLECTIONS else items
+                for name, items in zip(MEMORY_NAMESPACES, store.batch(self._load_ops(user_id)))
+            ]
+            snapshot = self._remember(user_id, version, results)
+        return snapshot
+
+    async def aget(self, store: BaseStore, user_id: str) -> MemorySnapshot:
+        stamp = await store.aget((VERSION_NAMESPACE, user_id), VERSION_KEY)
+        version = stamp.value["version"] if stamp else await self.ainvalidate(store, user_id)
+        snapshot = self._cached(user_id, version)
+        if snapshot is None:
+            results = [
+                await aread_collection(store, (name, user_id), items) if name in COLLECTIONS else items
+                for name, items in zip(MEMORY_NAMESPACES, await store.abatch(self._load_ops(user_id)))
+            ]
+            snapshot = self._remember(user_id, version, results)
+        return snapshot
+
+    def invalidate(self, store: BaseStore, user_id: str) -> str:
+        """Stamp a new memory version for the user and drop the local snapshot."""
+        version = uuid.uuid4().hex
+        store.put((VERSION_NAMESPACE, user_id), VERSION_KEY, {"version": version})
+        self._drop(user_id)
+        return version
+
+    async def ainvalidate(self, store: BaseStore, user_id: str) -> str:
+        version = uuid.uuid4().hex
+        await store.aput((VERSION_NAMESPACE, user_id), VERSION_KEY, {"version": version})
+        self._drop(user_id)
+        return version
+
+    def _cached(self, user_id: str, version: str) -> Optional[MemorySnapshot]:
+        with self._lock:
+            snapshot = self._snapshots.get(user_id)
+            if snapshot is not None and snapshot.version == version:
+                self._snapshots.move_to_end(user_id)
+                return snapshot
+        return None
+
+    def _load_ops(self, user_id: str) -> list[SearchOp]:
+        # Fetch every namespace in a single batch. A collection's search also returns its items,
+        # the pages after the first are read only for collections that fill it
+        return [
+            SearchOp((name, user_id), limit=COLLECTION_PAGE_SIZE if name in COLLECTIONS else 1)
+            for name in MEMORY_NAMESPACES
+        ]
+
+    def _remember(self, user_id: str, version: str, results: list) -> MemorySnapshot:
+        values = {
+            name: assemble_collection(name, items) if name in COLLECTIONS else (items[0].value if items else None)
+            for name, items in zip(MEMORY_NAMESPACES, results)
+        }
+        snapshot = MemorySnapshot(user_id=user_id, version=version, **values)
+        with self._lock:
+            self._snapshots[user_id] = snapshot
+            self._snapshots.move_to_end(user_id)
+            while len(self._snapshots) > self.maxsize:
+                self._snapshots.popitem(last=False)
+        return snapshot
+
+    def _drop(self, user_id: str) -> None:
+        with self._lock:
+            self._snapshots.pop(user_id, None)
+
+
+def assemble_collection(name: str, items: list) -> Optional[dict]:
+    """Rebuild a collection from the items found under its namespace.
+
+    Collections written before per-item storage have no index and may be split over several
+    documents (Trustcall inserts); their entries are concatenated until the next update
+    rewrites them item by item.
+    """
+    index = _index(items)
+    if index is None:
+        legacy = _legacy_items(name, items)
+        if not legacy:
+            return None
+        field_name = COLLECTIONS[name]
+        return {**legacy[0].value, field_name: [entry for item in legacy for entry in item.value[field_name]]}
+    entries = {item.key: item.value for item in items if item.namespace[2:] == (ITEMS_NAMESPACE,)}
+    fields = {k: v for k, v in index.value.items() if k != "keys"}
+    return {**fields, COLLECTIONS[name]: [entries[key] for key in index.value["keys"] if key in entries]}
+
+
+async def aload_collection(store: BaseStore, namespace: tuple) -> tuple[Optional[dict], list]:
+    """Current value of a collection and the items it was assembled from."""
+    items = await aread_collection(store, namespace)
+    return assemble_collection(namespace[0], items), items
+
+
+def read_collection(store: BaseStore, namespace: tuple, first_page: Optional[list] = None) -> list:
+    """Every item of a collection, searched page by page from `first_page` (read if not given).
+
+    Entries the index references that the pages missed, because they were written while the
+    pages were read, are fetched by key, so the collection is never assembled or saved
+    without some of its entries.
+    """
+    page = store.search(namespace, limit=COLLECTION_PAGE_SIZE) if first_page is None else first_page
+    items = list(page)
+    while len(page) == COLLECTION_PAGE_SIZE:
+        page = store.search(namespace, limit=COLLECTION_PAGE_SIZE, offset=len(items))
+        items += page
+    missing = _missing_ops(namespace, items)
+    if missing:
+        items += [item for item in store.batch(missing) if item is not None]
+    return _unique(items)
+
+
+async def aread_collection(store: BaseStore, namespace: tuple, first_page: Optional[list] = None) -> list:
+    page = await store.asearch(namespace, limit=COLLECTION_PAGE_SIZE) if first_page is None else first_page
+    items = list(page)
+    while len(page) == COLLECTION_PAGE_SIZE:
+        page = await store.asearch(namespace, limit=COLLECTION_PAGE_SIZE, offset=len(items))
+        items += page
+    missing = _missing_ops(namespace, items)
+    if missing:
+        items += [item for item in await store.abatch(missing) if item is not None]
+    return _unique(items)
+
+
+def _index(items: list):
+    return next((item for item in items if len(item.namespace) == 2 and item.key == INDEX_KEY), None)
+
+
+def _missing_ops(namespace: tuple, items: list) -> list[GetOp]:
+    """Reads of the entries the collection's index references that are not among `items`."""
+    index = _index(items)
+    if index is None:
+        return []
+    loaded = {item.key for item in items if item.namespace[2:] == (ITEMS_NAMESPACE,)}
+    return [GetOp((*namespace, ITEMS_NAMESPACE), key) for key in index.value["keys"] if key not in loaded]
+
+
+def _unique(items: list) -> list:
+    """Drop the items read twice by pages shifted by concurrent writes, keeping the last read."""
+    return list({(tuple(item.namespace), item.key): item for item in items}.values())
+
+
+def _legacy_items(name: str, items: list) -> list:
+    """Documents of a collection stored as whole values before per-item storage."""
+    field_name = COLLECTIONS[name]
+    return [
+        item for item in items
+        if len(item.namespace) == 2 and item.key != INDEX_KEY
+        and isinstance(item.value, dict) and isinstance(item.value.get(field_name), list)
+    ]
+
+
+async def asave_collection(store: BaseStore, namespace: tuple, value: dict, items: list) -> tuple[int, int, bool]:
+    """Write the entries of a collection that changed since `items` were loaded.
+
+    Entries identical to a stored one keep their key and are not written; changed entries
+    overwrite the entry previously at their position; removed entries are deleted. The index
+    is written only when the order of the entries or the other fields changed. Returns the
+    number of entries written or deleted, the number left unchanged, and whether anything
+    in the store changed (including the index alone, when entries were only reordered).
+    """
+    field_name = COLLECTIONS[namespace[0]]
+    items_namespace = (*namespace, ITEMS_NAMESPACE)
+    index = _index(items)
+    stored = {item.key: item.value for item in items if item.namespace[2:] == (ITEMS_NAMESPACE,)}
+    old_keys = [key for key in index.value["keys"] if key in stored] if index else []
+
+    # Keep the key of every entry that is unchanged
+    unchanged: dict[str, list[str]] = {}
+    for key in old_keys:
+        unchanged.setdefault(content_hash(stored[key]), []).append(key)
+    entries = value.get(field_name) or []
+    keys: list[Optional[str]] = []
+    for entry in entries:
+        same = unchanged.get(content_hash(entry))
+        keys.append(same.pop(0) if same else None)
+
+    # Changed entries take over the key at their position when it is free, new ones get a new key
+    claimed = {key for key in keys if key}
+    ops = []
+    for i, entry in enumerate(entries):
+        if keys[i] is None:
+            reuse = old_keys[i] if i < len(old_keys) and old_keys[i] not in claimed else None
+            keys[i] = reuse or str(uuid.uuid4())
+            claimed.add(keys[i])
+            ops.append(PutOp(items_namespace, keys[i], entry))
+    skipped = len(entries) - len(ops)
+    ops += [PutOp(items_namespace, key, None) for key in stored if key not in claimed]
+    written = len(ops)
+
+    # Drop the whole-value documents folded into the collection by assemble_collection
+    ops += [PutOp(namespace, item.key, None) for item in _legacy_items(namespace[0], items)]
+
+    index_value = {**{k: v for k, v in value.items() if k != field_name}, "keys": keys}
+    if index is None or index.value != index_value:
+        ops.append(PutOp(namespace, INDEX_KEY, index_value))
+    if ops:
+        await store.abatch(ops)
+    return written, skipped, bool(ops)
+
+
+snapshot_cache = SnapshotCache()
+
+
+def get_snapshot(store: BaseStore, user_id: str) -> MemorySnapshot:
+    """Get the current memory snapshot for a user."""
+    return snapshot_cache.get(store, user_id)
+
+
+def invalidate(store: BaseStore, user_id: str) -> str:
+    """Invalidate the memory snapshot for a user after writing to the store."""
+    return snapshot_cache.invalidate(store, user_id)
+
+
+async def aget_snapshot(store: BaseStore, user_id: str) -> MemorySnapshot:
+    return await snapshot_cache.aget(store, user_id)
+
+
+async def ainvalidate(store: BaseStore, user_id: str) -> str:
+    return await snapshot_cache.ainvalidate(store, user_id)
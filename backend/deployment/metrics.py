@@ -0,0 +1,288 @@
+import json
+import logging
+import threading
+import time
+from collections import defaultdict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Iterable, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+from langgraph.config import get_config
+from langgraph.store.base import BaseStore, GetOp, ListNamespacesOp, Op, PutOp, Result, SearchOp
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds of the node duration histogram, in seconds
+DURATION_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+STORE_OPS = {GetOp: "get", SearchOp: "search", PutOp: "put", ListNamespacesOp: "list_namespaces"}
+
+
+def _node_totals() -> dict:
+    return {
+        "calls": 0,
+        "seconds": 0.0,
+        "prompt_tokens": 0,
+        "completion_tokens": 0,
+        "cached_tokens": 0,
+        "store_ops": defaultdict(int),
+        "store_bytes_read": 0,
+        "store_bytes_written": 0,
+    }
+
+
+class GraphMetrics(BaseCallbackHandler):
+    """Callback handler recording per-node wall time, LLM tokens and store traffic.
+
+    Attach it to the compiled graph's callbacks so it sees every run, including the nodes of
+    subgraphs. Each chat model call and store operation is attributed to the graph node it
+    ran under. Totals since startup are exposed in the Prometheus text format by `prometheus()`,
+    and a summary of each finished run is logged and kept in `recent_runs`.
+
+    Args:
+        nodes: Names of the graph nodes to report; runs inside them (Trustcall's own graph,
+            routing functions) are attributed to the enclosing node
+        max_runs: Number of run summaries kept in `recent_runs`
+    """
+
+    # Cheap bookkeeping, no need to hand off to an executor
+    run_inline = True
+
+    def __init__(self, nodes: Iterable[str], max_runs: int = 100):
+        self.nodes = set(nodes)
+        self._lock = threading.Lock()
+        # Enclosing graph node and root run of every run in flight
+        self._node_of: dict[UUID, Optional[str]] = {}
+        self._root_of: dict[UUID, UUID] = {}
+        self._started: dict[UUID, float] = {}
+        self._runs: dict[UUID, dict[str, dict]] = {}
+        self.totals: dict[str, dict] = defaultdict(_node_totals)
+        self.durations: dict[str, list[int]] = defaultdict(lambda: [0] * (len(DURATION_BUCKETS) + 1))
+        self.recent_runs: deque = deque(maxlen=max_runs)
+
+    # Runs
+
+    def on_chain_start(self, serialized: Optional[dict], inputs: Any, *, run_id: UUID,
+                       parent_run_id: Optional[UUID] = None, **kwargs: Any) -> None:
+        name = kwargs.get("name") or (serialized or {}).get("name")
+        with self._lock:
+            root = self._root_of.get(parent_run_id, run_id) if parent_run_id else run_id
+            self._root_of[run_id] = root
+            if name in self.nodes and parent_run_id is not None:
+                self._node_of[run_id] = name
+                self._started[run_id] = time.perf_counter()
+            else:
+                self._node_of[run_id] = self._node_of.get(parent_run_id)
+            if parent_run_id is None:
+                self._started[run_id] = time.perf_counter()
+                self._runs[run_id] = defaultdict(_node_totals)
+
+    def on_chain_end(self, outputs: Any, *, run_id: UUID, parent_run_id: Optional[UUID] = None, **kwargs: Any) -> None:
+        self._end(run_id, parent_run_id)
+
+    def on_chain_error(self, error: BaseException, *, run_id: UUID, parent_run_id: Optional[UUID] = None, **kwargs: Any) -> None:
+        self._end(run_id, parent_run_id)
+
+    def _end(self, run_id: UUID, parent_run_id: Optional[UUID]) -> None:
+        summary = None
+        with self._lock:
+            started = self._started.pop(run_id, None)
+            node = self._node_of.pop(run_id, None)
+            root = self._root_of.pop(run_id, run_id)
+            if started is None:
+                return
+            elapsed = time.perf_counter() - started
+            if parent_run_id is None:
+                nodes = self._runs.pop(run_id, {})
+                summary = {
+                    "run_id": str(run_id),
+                    "seconds": round(elapsed, 4),
+                    "nodes": {name: _plain(totals) for name, totals in nodes.items()},
+                }
+                self.recent_runs.append(summary)
+            elif node is not None:
+                for totals in self._targets(node, root):
+                    totals["calls"] += 1
+                    totals["seconds"] += elapsed
+                buckets = self.durations[node]
+                buckets[next((i for i, b in enumerate(DURATION_BUCKETS) if elapsed <= b), len(DURATION_BUCKETS))] += 1
+        if summary is not None:
+            logger.info("run summary: %s", json.dumps(summary))
+
+    def _targets(self, node: str, root: Optional[UUID]) -> list[dict]:
+        """Totals to update for a node: the process-wide ones and those of its run, if still open."""
+        targets = [self.totals[node]]
+        run = self._runs.get(root)
+        if run is not None:
+            targets.append(run[node])
+        return targets
+
+    # Chat models
+
+    def on_chat_model_start(self, serialized: dict, messages: list, *, run_id: UUID,
+                            parent_run_id: Optional[UUID] = None, **kwargs: Any) -> None:
+        with self._lock:
+            self._node_of[run_id] = self._node_of.get(parent_run_id)
+            self._root_of[run_id] = self._root_of.get(parent_run_id, run_id)
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        usage = _usage(response)
+        with self._lock:
+            node = self._node_of.pop(run_id, None) or "unknown"
+            root = self._root_of.pop(run_id, None)
+            if usage is None:
+                return
+            cached = (usage.get("input_token_details") or {}).get("cache_read", 0) or 0
+            for totals in self._targets(node, root):
+                totals["prompt_tokens"] += usage.get("input_tokens", 0)
+                totals["completion_tokens"] += usage.get("output_tokens", 0)
+                totals["cached_tokens"] += cached
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        with self._lock:
+            self._node_of.pop(run_id, None)
+            self._root_of.pop(run_id, None)
+
+    # Store
+
+    def record_store(self, parent_run_id: Optional[UUID], ops: dict[str, int], bytes_read: int, bytes_written: int) -> None:
+        with self._lock:
+            node = self._node_of.get(parent_run_id) or "unknown"
+            for totals in self._targets(node, self._root_of.get(parent_run_id)):
+                for op, count in ops.items():
+                    totals["store_ops"][op] += count
+                totals["store_bytes_read"] += bytes_read
+                totals["store_bytes_written"] += bytes_written
+
+    # Export
+
+    def prometheus(self) -> str:
+        """Totals since startup in the Prometheus text exposition format."""
+        lines = [
+            "# HELP hunter_node_duration_seconds Wall time of graph node runs",
+            "# TYPE hunter_node_duration_seconds histogram",
+        ]
+        with self._lock:
+            for node, buckets in sorted(self.durations.items()):
+                cumulative = 0
+                for bound, count in zip((*DURATION_BUCKETS, "+Inf"), buckets):
+                    cumulative += count
+                    lines.append(f'hunter_node_duration_seconds_bucket{{node="{node}",le="{bound}"}} {cumulative}')
+                lines.append(f'hunter_node_duration_seconds_sum{{node="{node}"}} {self.totals[node]["seconds"]:.6f}')
+                lines.append(f'hunter_node_duration_seconds_count{{node="{node}"}} {cumulative}')
+
+            lines += ["# HELP hunter_llm_tokens_total LLM tokens by node and kind",
+                      "# TYPE hunter_llm_tokens_total counter"]
+            for node, totals in sorted(self.totals.items()):
+                for kind in ("prompt", "completion", "cached"):
+                    lines.append(f'hunter_llm_tokens_total{{node="{node}",kind="{kind}"}} {totals[f"{kind}_tokens"]}')
+
+            lines += ["# HELP hunter_store_operations_total Store operations by node and type",
+                      "# TYPE hunter_store_operations_total counter"]
+            for node, totals in sorted(self.totals.items()):
+                for op, count in sorted(totals["store_ops"].items()):
+                    lines.append(f'hunter_store_operations_total{{node="{node}",op="{op}"}} {count}')
+
+            lines += ["# HELP hunter_store_bytes_total JSON payload bytes read from and written to the store",
+                      "# TYPE hunter_store_bytes_total counter"]
+            for node, totals in sorted(self.totals.items()):
+                lines.append(f'hunter_store_bytes_total{{node="{node}",direction="read"}} {totals["store_bytes_read"]}')
+                lines.append(f'hunter_store_bytes_total{{node="{node}",direction="write"}} {totals["store_bytes_written"]}')
+        return "\n".join(lines) + "\n"
+
+
+class InstrumentedStore(BaseStore):
+    """Store wrapper that reports operation counts and payload sizes to GraphMetrics.
+
+    Operations are attributed to the graph node that issued them through the runnable
+    config of the calling node.
+    """
+
+    def __init__(self, store: BaseStore, metrics: GraphMetrics):
+        self.store = store
+        self.metrics = metrics
+
+    def batch(self, ops: Iterable[Op]) -> list[Result]:
+        ops = list(ops)
+        results = self.store.batch(ops)
+        self._record(ops, results)
+        return results
+
+    async def abatch(self, ops: Iterable[Op]) -> list[Result]:
+        ops = list(ops)
+        results = await self.store.abatch(ops)
+        self._record(ops, results)
+        return results
+
+    def _record(self, ops: list[Op], results: list[Result]) -> None:
+        counts: dict[str, int] = defaultdict(int)
+        bytes_read = bytes_written = 0
+        for op, result in zip(ops, results):
+            counts[STORE_OPS.get(type(op), type(op).__name__)] += 1
+            if isinstance(op, PutOp) and op.value is not None:
+                bytes_written += _size(op.value)
+            elif isinstance(op, GetOp) and result is not None:
+                bytes_read += _size(result.value)
+            elif isinstance(op, SearchOp):
+                bytes_read += sum(_size(item.value) for item in result)
+        self.metrics.record_store(_current_run_id(), counts, bytes_read, bytes_written)
+
+
+def _current_run_id() -> Optional[UUID]:
+    """Run ID of the node calling the store, if called from inside a graph."""
+    try:
+        callbacks = get_config().get("callbacks")
+    except RuntimeError:
+        return None
+    return getattr(callbacks, "parent_run_id", None)
+
+
+def _size(value: Any) -> int:
+    return len(json.dumps(value, default=str))
+
+
+def _usage(response: LLMResult) -> Optional[dict]:
+    for generations in response.generations:
+        for generation in generations:
+            usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+            if usage:
+                return usage
+    return None
+
+
+def _plain(totals: dict) -> dict:
+    return {**totals, "seconds": round(totals["seconds"], 4), "store_ops": dict(totals["store_ops"])}
+
+
+def serve_metrics(metrics: GraphMetrics, port: int, host: str = "0.0.0.0", collectors: Iterable = ()) -> ThreadingHTTPServer:
+    """Serve `/metrics` (Prometheus) and `/runs` (recent run summaries as JSON) from a daemon thread.
+
+    `collectors` are other objects with a `prometheus()` method whose metrics are served alongside.
+    """
+    collectors = list(collectors)
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path == "/metrics":
+                body = metrics.prometheus() + "".join(c.prometheus() for c in collectors)
+                content_type = "text/plain; version=0.0.4"
+            elif self.path == "/runs":
+                body, content_type = json.dumps(list(metrics.recent_runs)), "application/json"
+            else:
+                self.send_error(404)
+                return
+            payload = body.encode()
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True, name="metrics").start()
+    return server
@@ -0,0 +1,36 @@
+import threading
+from typing import Callable
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_openai import ChatOpenAI
+
+
+def openai_model(name: str) -> BaseChatModel:
+    # Rate limited calls are retried by the scheduler. Usage is also requested when
+    # streaming so token counts are recorded for every node
+    return ChatOpenAI(model=name, temperature=0, max_retries=0, stream_usage=True)
+
+
+class ModelPool:
+    """One shared chat model client per model name, created on first use.
+
+    Reusing a client keeps its HTTP connection pool warm and lets prebuilt extractors,
+    token buckets and cache keys that are tied to a model be reused across runs.
+
+    Args:
+        factory: Creates the client for a model name
+    """
+
+    def __init__(self, factory: Callable[[str], BaseChatModel] = openai_model):
+        self.factory = factory
+        self._models: dict[str, BaseChatModel] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> BaseChatModel:
+        model = self._models.get(name)
+        if model is None:
+            with self._lock:
+                model = self._models.get(name)
+                if model is None:
+                    model = self._models[name] = self.factory(name)
+        return model
@@ -0,0 +1,105 @@
+import re
+from collections import Counter
+from typing import Iterable, Optional
+
+from langgraph.store.base import BaseStore, GetOp, PutOp
+
+from retrieval import tokenize
+from schema import render_memory
+from utils import content_hash, posting_id
+
+# Digests are shared by every user applying to the same posting
+DIGEST_NAMESPACE = ("posting_index",)
+
+# Terms that say nothing about a posting's requirements on top of the common stopwords
+GENERIC_TERMS = frozenset(
+    "about across all also any can do ensure etc including job looking must new not other role "
+    "strong team teams us using work working years year experience ability skills build own maintain "
+    "help support".split()
+)
+MAX_KEYWORDS = 12
+SUMMARY_CHARS = 300
+
+
+def build_digest(posting: dict) -> dict:
+    """Normalized requirement index of a JobPosting: skills, experience, responsibilities and keywords."""
+    experience = posting.get("required_experience") or {}
+    description = posting.get("job_description") or ""
+    skills = _normalize_list(posting.get("qualifications"))
+    responsibilities = _normalize_list(posting.get("responsibilities"))
+    return {
+        "posting_id": posting_id(posting),
+        "source": content_hash(posting),
+        "job_title": posting.get("job_title"),
+        "company": (posting.get("company") or {}).get("name"),
+        "employment_type": (posting.get("employment_type") or {}).get("type"),
+        "location_type": posting.get("job_location_type"),
+        "years": experience.get("years"),
+        "experience_field": experience.get("field"),
+        "skills": skills,
+        "responsibilities": responsibilities,
+        "keywords": _keywords([description, *skills, *responsibilities]),
+        "summary": _summary(description),
+    }
+
+
+def render_digest(digest: Optional[dict]) -> str:
+    """Compact prompt rendering of a digest, "None" like render_memory when there is none."""
+    if not digest:
+        return render_memory(None)
+    return render_memory({k: v for k, v in digest.items() if k not in ("posting_id", "source")})
+
+
+async def aget_digest(store: BaseStore, posting: Optional[dict]) -> Optional[dict]:
+    """The stored digest of a posting, built and saved first if it is missing or out of date.
+
+    None for a missing or empty posting.
+    """
+    if not posting:
+        return None
+    return (await asave_digests(store, [posting]))[0]
+
+
+async def asave_digests(store: BaseStore, postings: Iterable[dict]) -> list[dict]:
+    """Make sure every posting has an up-to-date digest, with one batch of reads and at most one of writes."""
+    postings = [posting for posting in postings if posting]
+    stored = await store.abatch([GetOp(DIGEST_NAMESPACE, posting_id(posting)) for posting in postings])
+    digests, puts = [], []
+    for posting, item in zip(postings, stored):
+        if item is not None and item.value.get("source") == content_hash(posting):
+            digests.append(item.value)
+            continue
+        digest = build_digest(posting)
+        digests.append(digest)
+        puts.append(PutOp(DIGEST_NAMESPACE, digest["posting_id"], digest))
+    if puts:
+        await store.abatch(puts)
+    return digests
+
+
+def _normalize_list(values: Optional[list]) -> list[str]:
+    """Strip, drop trailing punctuation and remove case-insensitive duplicates, keeping the order."""
+    seen, normalized = set(), []
+    for value in values or []:
+        value = re.sub(r"\s+", " ", str(value)).strip().rstrip(".;,")
+        if value and value.lower() not in seen:
+            seen.add(value.lower())
+            normalized.append(value)
+    return normalized
+
+
+def _keywords(texts: list[str]) -> list[str]:
+    counts = Counter(
+        token for text in texts for token in tokenize(text)
+        if len(token) > 2 and not token.isdigit() and token not in GENERIC_TERMS
+    )
+    return [token for token, _ in counts.most_common(MAX_KEYWORDS)]
+
+
+def _summary(description: str) -> Optional[str]:
+    """The description's first sentences, up to SUMMARY_CHARS."""
+    description = re.sub(r"\s+", " ", description).strip()
+    if len(description) <= SUMMARY_CHARS:
+        return description or None
+    cut = description.rfind(". ", 0, SUMMARY_CHARS)
+    return description[: cut + 1] if cut > 0 else description[:SUMMARY_CHARS].rsplit(" ", 1)[0] + "..."
@@ -0,0 +1,83 @@
+import asyncio
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ReportDraft:
+    """ Running report of one set of interviews """
+    text: str = ""
+    merged: list[str] = field(default_factory=list)  # sections the text was written from
+    pending: list[str] = field(default_factory=list)  # finished sections not merged into the text
+    finished: int = 0  # interviews done
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock, repr=False)
+    failed: bool = False
+
+    @property
+    def sections(self) -> list[str]:
+        return [*self.merged, *self.pending]
+
+
+class ReportDrafts:
+    """Process-local running drafts of interview reports, merged section by section.
+
+    A section is merged into the draft of its report only while other interviews of the
+    report are still running, so the merge overlaps with them. The sections of the last
+    interviews to finish are left pending for the final step to reconcile with the draft.
+    Merges of the same report run one at a time. A draft whose merge failed is kept but
+    marked as failed, so the report falls back to being written from all the sections.
+
+    Args:
+        max_reports: Number of drafts kept; the oldest are dropped first
+    """
+
+    def __init__(self, max_reports: int = 256):
+        self.max_reports = max_reports
+        self._drafts: OrderedDict[str, ReportDraft] = OrderedDict()
+        self._lock = threading.Lock()
+
+    async def add(self, report_id: str, sections: list[str], interviews: int,
+                  merge: Callable[[str, str], Awaitable[str]]) -> None:
+        """Add the sections of a finished interview out of `interviews`.
+
+        They are merged with `merge(draft, section)`, which returns the new draft, if some of
+        the other interviews are still running, and left pending otherwise.
+        """
+        draft = self._get(report_id)
+        with self._lock:
+            draft.finished += 1
+            others_running = draft.finished < interviews
+            if not others_running or draft.failed:
+                draft.pending.extend(sections)
+                return
+        async with draft.lock:
+            for section in sections:
+                if draft.failed:
+                    return
+                try:
+                    draft.text = await merge(draft.text, section)
+                except Exception:
+                    logger.warning("merging a section into report %s failed", report_id, exc_info=True)
+                    draft.failed = True
+                    return
+                draft.merged.append(section)
+
+    def pop(self, report_id: Optional[str]) -> Optional[ReportDraft]:
+        """Remove and return the draft of a report, if it has one that is intact."""
+        with self._lock:
+            draft = self._drafts.pop(report_id, None)
+        return None if draft is None or draft.failed else draft
+
+    def _get(self, report_id: str) -> ReportDraft:
+        with self._lock:
+            draft = self._drafts.get(report_id)
+            if draft is None:
+                draft = self._drafts[report_id] = ReportDraft()
+                while len(self._drafts) > self.max_reports:
+                    self._drafts.popitem(last=False)
+            return draft
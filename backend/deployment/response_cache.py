@@ -0,0 +1,168 @@
+import asyncio
+import hashlib
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Awaitable, Callable, Optional
+
+from langchain_core.messages import BaseMessage, convert_to_messages, message_to_dict, messages_from_dict
+
+from sqlite_store import connect
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at);
+"""
+
+
+class ResponseCache:
+    """Disk-backed cache of model responses, keyed by model, temperature and normalized prompt.
+
+    Entries older than `ttl` seconds are treated as misses, and the least recently used
+    entries are evicted once there are more than `max_entries`. A cache without a path is
+    disabled and simply makes the call.
+
+    Args:
+        path: Location of the SQLite database file, or None to disable caching
+        ttl: Seconds an entry stays valid (0 keeps entries until they are evicted)
+        max_entries: Maximum number of cached responses
+        timeout: Maximum number of seconds to wait on a locked database
+    """
+
+    def __init__(self, path: Optional[str], *, ttl: float = 0, max_entries: int = 10000, timeout: float = 5.0):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self.hits = 0
+        self.misses = 0
+        self._local = threading.local()
+        if path:
+            self._conn().executescript(SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        """Connection for the current thread."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = connect(self.path, self.timeout)
+        return conn
+
+    def key(self, model: Any, messages: list, schema: Optional[type] = None) -> str:
+        """Hash of the model name, temperature, output schema and normalized messages."""
+        canonical = {
+            "model": getattr(model, "model_name", None) or type(model).__name__,
+            "temperature": getattr(model, "temperature", None),
+            "schema": schema.__name__ if schema else None,
+            "messages": [_normalize(m) for m in convert_to_messages(messages)],
+        }
+        payload = json.dumps(canonical, sort_keys=True, separators=(",", ":"), default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        conn = self._conn()
+        row = conn.execute("SELECT value, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        value, created_at = row
+        if self.ttl and created_at < now - self.ttl:
+            conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            return None
+        conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+        return value
+
+    def put(self, key: str, value: str) -> None:
+        now = time.time()
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, value, now, now),
+            )
+            if self.ttl:
+                conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl,))
+            # Least recently used entries beyond the size limit
+            conn.execute(
+                "DELETE FROM responses WHERE key IN "
+                "(SELECT key FROM responses ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    async def acall(
+        self,
+        model: Any,
+        messages: list,
+        call: Callable[[], Awaitable[Any]],
+        *,
+        schema: Optional[type] = None,
+        on_hit: Optional[Callable[[Any], None]] = None,
+    ) -> Any:
+        """Return the cached response to these messages, or make the call and cache its result.
+
+        Args:
+            model: Model the call uses, part of the key
+            messages: Messages the call sends, part of the key
+            call: Makes the model call on a miss
+            schema: Pydantic model returned by a structured output call; messages are cached otherwise
+            on_hit: Called with a cached response, e.g. to write it to the stream
+        """
+        if not self.path:
+            return await call()
+
+        loop = asyncio.get_running_loop()
+        key = self.key(model, messages, schema)
+        cached = await loop.run_in_executor(None, self.get, key)
+        if cached is not None:
+            self.hits += 1
+            logger.debug("response cache hit (%d hits, %d misses)", self.hits, self.misses)
+            response = (
+                schema.model_validate_json(cached) if schema
+                else messages_from_dict([json.loads(cached)])[0]
+            )
+            if on_hit is not None:
+                on_hit(response)
+            return response
+
+        self.misses += 1
+        response = await call()
+        value = response.model_dump_json() if schema else json.dumps(message_to_dict(response))
+        await loop.run_in_executor(None, self.put, key, value)
+        return response
+
+    def stats(self) -> dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses}
+
+    def prometheus(self) -> str:
+        lines = ["# HELP hunter_response_cache_total Response cache lookups",
+                 "# TYPE hunter_response_cache_total counter"]
+        lines += [f'hunter_response_cache_total{{outcome="hit"}} {self.hits}',
+                  f'hunter_response_cache_total{{outcome="miss"}} {self.misses}']
+        return "\n".join(lines) + "\n"
+
+
+def _normalize(message: BaseMessage) -> dict:
+    """The parts of a message that affect the response, with insignificant whitespace removed."""
+    content = message.content
+    if isinstance(content, str):
+        content = re.sub(r"[ \t]+\n", "\n", content).strip()
+    return {
+        "type": message.type,
+        "name": message.name,
+        "content": content,
+        "tool_calls": getattr(message, "tool_calls", None) or None,
+    }
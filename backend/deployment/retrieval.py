@@ -0,0 +1,184 @@
+import asyncio
+import logging
+import math
+import re
+from collections import Counter, defaultdict
+from functools import lru_cache
+from typing import NamedTuple
+
+from schema import render_memory
+
+logger = logging.getLogger(__name__)
+
+TOKEN_PATTERN = re.compile(r"\w+")
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have how i in is it its me my of on or our "
+    "that the their this to was we were what when where which who why will with you your".split()
+)
+
+
+class Chunk(NamedTuple):
+    """ A passage of a user document """
+    citation: int  # 1-based position of the document in the collection
+    title: str
+    source: str
+    text: str
+
+
+def tokenize(text: str) -> list[str]:
+    return [t for t in TOKEN_PATTERN.findall(text.lower()) if t not in STOPWORDS]
+
+
+def chunk_documents(documents: list[dict], chunk_size: int = 1000) -> list[Chunk]:
+    """Split documents into chunks of about `chunk_size` characters along paragraph boundaries."""
+    chunks = []
+    for citation, document in enumerate(documents, start=1):
+        title, source = document.get("title", ""), document.get("source", "")
+        current = ""
+        for paragraph in re.split(r"\n\s*\n", document.get("content") or ""):
+            paragraph = paragraph.strip()
+            if not paragraph:
+                continue
+            # Hard-wrap paragraphs that are longer than a chunk on their own
+            while len(paragraph) > chunk_size:
+                if current:
+                    chunks.append(Chunk(citation, title, source, current))
+                    current = ""
+                chunks.append(Chunk(citation, title, source, paragraph[:chunk_size]))
+                paragraph = paragraph[chunk_size:]
+            if current and len(current) + len(paragraph) + 2 > chunk_size:
+                chunks.append(Chunk(citation, title, source, current))
+                current = ""
+            current = f"{current}\n\n{paragraph}" if current else paragraph
+        if current or not chunks or chunks[-1].citation != citation:
+            chunks.append(Chunk(citation, title, source, current))
+    return chunks
+
+
+class DocumentIndex:
+    """BM25 index over the chunks of a DocumentCollection, optionally fused with embedding similarity.
+
+    Args:
+        documents: The `documents` list of a DocumentCollection
+        chunk_size: Target chunk length in characters
+        embeddings: Optional LangChain Embeddings used for hybrid ranking
+    """
+
+    def __init__(self, documents: list[dict], chunk_size: int = 1000, embeddings=None, k1: float = 1.5, b: float = 0.75):
+        self.chunks = chunk_documents(documents, chunk_size)
+        self.k1 = k1
+        self.b = b
+
+        self._postings: dict[str, list[tuple[int, int]]] = defaultdict(list)
+        self._lengths = []
+        for i, chunk in enumerate(self.chunks):
+            terms = tokenize(f"{chunk.title} {chunk.text}")
+            self._lengths.append(len(terms))
+            for term, tf in Counter(terms).items():
+                self._postings[term].append((i, tf))
+        self._avg_length = (sum(self._lengths) / len(self._lengths)) if self._lengths else 0.0
+
+        self.embeddings = embeddings
+        self._vectors = (
+            [_normalize(v) for v in embeddings.embed_documents([f"{c.title}\n{c.text}" for c in self.chunks])]
+            if embeddings is not None and self.chunks
+            else None
+        )
+
+    def bm25(self, query: str) -> dict[int, float]:
+        n = len(self.chunks)
+        scores: dict[int, float] = defaultdict(float)
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+            for i, tf in postings:
+                norm = self.k1 * (1 - self.b + self.b * self._lengths[i] / (self._avg_length or 1))
+                scores[i] += idf * tf * (self.k1 + 1) / (tf + norm)
+        return scores
+
+    def search(self, query: str, k: int) -> list[Chunk]:
+        """Return the `k` chunks most relevant to the query, in document order."""
+        if len(self.chunks) <= k:
+            return list(self.chunks)
+
+        ranked = sorted(self.bm25(query).items(), key=lambda item: -item[1])
+        if self._vectors is not None:
+            # Reciprocal rank fusion of the lexical and embedding rankings
+            query_vector = _normalize(self.embeddings.embed_query(query))
+            similarities = sorted(
+                range(len(self.chunks)),
+                key=lambda i: -sum(a * b for a, b in zip(query_vector, self._vectors[i])),
+            )
+            fused: dict[int, float] = defaultdict(float)
+            for rank, (i, _) in enumerate(ranked):
+                fused[i] += 1 / (60 + rank)
+            for rank, i in enumerate(similarities):
+                fused[i] += 1 / (60 + rank)
+            ranked = sorted(fused.items(), key=lambda item: -item[1])
+
+        selected = [i for i, _ in ranked[:k]]
+        # Without any matches fall back to the start of the collection
+        selected += [i for i in range(len(self.chunks)) if i not in selected][: k - len(selected)]
+        return [self.chunks[i] for i in sorted(selected)]
+
+    def render(self, query: str, k: int) -> str:
+        """Format the top `k` chunks for a prompt, numbered by their document's position in the collection."""
+        parts = []
+        last_citation = None
+        for chunk in self.search(query, k):
+            if chunk.citation != last_citation:
+                parts.append(f"[{chunk.citation}] {chunk.title} (Source: {chunk.source})")
+                last_citation = chunk.citation
+            parts.append(chunk.text)
+        return "\n\n".join(parts)
+
+
+@lru_cache(maxsize=None)
+def get_embeddings(model_name: str):
+    """Load a local sentence-transformers embedding model, or None if it is not installed."""
+    try:
+        from langchain_community.embeddings import HuggingFaceEmbeddings
+        return HuggingFaceEmbeddings(model_name=model_name)
+    except ImportError:
+        logger.warning("sentence-transformers is not installed, ranking documents with BM25 only")
+        return None
+
+
+def _normalize(vector: list[float]) -> list[float]:
+    norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+    return [v / norm for v in vector]
+
+
+def retrieve_documents(snapshot, query: str, configurable) -> str:
+    """Render the snapshot's documents most relevant to the query.
+
+    Falls back to the whole DocumentCollection when retrieval is disabled (document_retrieval_k=0).
+    """
+    documents = snapshot.documents
+    if not documents or not configurable.document_retrieval_k:
+        return render_memory(documents)
+    model_name = configurable.document_embedding_model
+    index = snapshot.memo(
+        ("document_index", configurable.document_chunk_size, model_name),
+        lambda: DocumentIndex(
+            documents.get("documents", []),
+            chunk_size=configurable.document_chunk_size,
+            embeddings=get_embeddings(model_name) if model_name else None,
+        ),
+    )
+    return index.render(query, configurable.document_retrieval_k)
+
+
+async def aretrieve_documents(snapshot, query: str, configurable) -> str:
+    """retrieve_documents for async nodes.
+
+    Loading the embedding model and embedding the chunks and the query block, so with an
+    embedding model configured retrieval runs in the default executor instead of the event loop.
+    """
+    if configurable.document_embedding_model and configurable.document_retrieval_k and snapshot.documents:
+        return await asyncio.get_running_loop().run_in_executor(
+            None, retrieve_documents, snapshot, query, configurable
+        )
+    return retrieve_documents(snapshot, query, configurable)
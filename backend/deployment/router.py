@@ -0,0 +1,183 @@
+import math
+import random
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+from typing import Optional
+
+from retrieval import TOKEN_PATTERN
+
+# Labels the fast path can decide without the LLM
+BEGIN_INTERVIEW = "begin_interview"  # call UpdateMemory(active_application)
+REPLY = "reply"  # answer a thank-you with a canned reply, no memory update
+OTHER = "other"  # anything else goes to hunter
+
+# Longer messages usually carry information that must be saved, so they always go to hunter
+MAX_TOKENS = 20
+
+# Questions are answered by hunter, never routed straight to an interview
+QUESTION = re.compile(r"\?\s*$|^(how|what|when|where|why|who|which|should|is|are|do|does|did)\b", re.I)
+
+# Messages about preparing for an interview rather than starting one
+PREPARATION = re.compile(r"\binterview\s*(prep|preparation|practice|tips|questions|notes|advice)\b", re.I)
+
+# Words like "ok" or "sounds good" may accept something hunter proposed, so only thank-yous are replied to
+RULES = [
+    (re.compile(r"^((ok|okay|great|perfect|cool)[\s,!.]+)?(thanks|thank you|thx|ty)"
+                r"( so much| very much| a lot)?[\s!.]*$", re.I), REPLY, 1.0),
+    # Only explicit requests to start an interview, not "do the interview prep" or "take the interview tips"
+    (re.compile(r"^(please\s+)?(can you\s+|could you\s+|let'?s\s+)?(please\s+)?(start|begin|attend|conduct)\s+"
+                r"(the|my|an|this|that)\s+(\w+\s+){0,2}?interview\b", re.I), BEGIN_INTERVIEW, 0.95),
+]
+
+# Seed examples for the naive Bayes classifier
+EXAMPLES = {
+    REPLY: [
+        "thanks", "thank you so much", "ok thanks", "great thank you", "thanks a lot",
+        "perfect thanks", "got it thanks", "thank you", "thanks for the help", "ok great thanks",
+    ],
+    BEGIN_INTERVIEW: [
+        "start the interview for the acme role", "begin the interview", "please attend the interview for me",
+        "can you do the interview for the data engineer job", "let's start the interview",
+        "interview for the google position please", "go to my interview at initech",
+        "i'm ready for the interview", "run the interview for this application",
+    ],
+    OTHER: [
+        "here is my resume", "i applied to a job at globex", "update my skills with python",
+        "what jobs have i applied to", "add my project report to my documents",
+        "i got rejected from acme", "can you help me improve my resume",
+        "my email is jane at example dot com", "i prefer short bullet points",
+        "what did the interviewers think of me", "how did my last interview go",
+        "i have an interview next week at globex", "remove the initech application",
+        "how do i prepare for the interview", "when is my interview", "any tips for my interview",
+        "what questions will they ask in the interview", "should i take the interview",
+        "ok", "sounds good", "yes please", "sure go ahead", "cool", "awesome", "ok great",
+        "please do the interview prep with me", "take the interview tips and save them",
+    ],
+}
+
+CANNED_REPLY = "You're welcome! Let me know whenever you have something new to add or want to start an interview."
+
+
+def tokenize(text: str) -> list[str]:
+    # Keep stopwords: in short messages they carry most of the signal
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class NaiveBayes:
+    """Multinomial naive Bayes over word unigrams and bigrams with Laplace smoothing."""
+
+    def __init__(self, examples: dict[str, list[str]]):
+        self.counts = {label: Counter() for label in examples}
+        self.priors = {}
+        total = sum(len(texts) for texts in examples.values())
+        for label, texts in examples.items():
+            self.priors[label] = math.log(len(texts) / total)
+            for text in texts:
+                self.counts[label].update(_features(text))
+        self.vocabulary = set().union(*self.counts.values())
+        self.totals = {label: sum(counts.values()) for label, counts in self.counts.items()}
+
+    def predict(self, text: str) -> tuple[str, float]:
+        """Most likely label and its posterior probability."""
+        features = [f for f in _features(text) if f in self.vocabulary]
+        scores = {
+            label: self.priors[label] + sum(
+                math.log((self.counts[label][f] + 1) / (self.totals[label] + len(self.vocabulary)))
+                for f in features
+            )
+            for label in self.counts
+        }
+        best = max(scores, key=scores.get)
+        norm = sum(math.exp(score - scores[best]) for score in scores.values())
+        return best, 1 / norm
+
+
+def _features(text: str) -> list[str]:
+    tokens = tokenize(text)
+    return tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+
+
+class FastRouter:
+    """Local pre-classifier that routes obvious turns without a hunter LLM call.
+
+    Rules are tried first, then a naive Bayes classifier. A decision is taken only when its
+    confidence reaches `threshold`; a `shadow_rate` fraction of those decisions still go to
+    hunter so its routing can be compared with the prediction, which is what the accuracy
+    counters measure.
+
+    Args:
+        threshold: Minimum confidence for a fast path decision
+        shadow_rate: Fraction of confident decisions checked against hunter instead
+    """
+
+    def __init__(self, threshold: float = 0.9, shadow_rate: float = 0.05):
+        self.threshold = threshold
+        self.shadow_rate = shadow_rate
+        self.classifier = NaiveBayes(EXAMPLES)
+        self._lock = threading.Lock()
+        self.counters = defaultdict(int)
+        self.seconds = 0.0
+
+    def classify(self, text: str) -> tuple[str, float]:
+        """Label and confidence for a user message."""
+        text = text.strip()
+        if not text or len(tokenize(text)) > MAX_TOKENS:
+            return OTHER, 1.0
+        for pattern, label, confidence in RULES:
+            if pattern.search(text):
+                break
+        else:
+            label, confidence = self.classifier.predict(text)
+        if label == BEGIN_INTERVIEW and (QUESTION.search(text) or PREPARATION.search(text)):
+            return OTHER, confidence
+        return label, confidence
+
+    def decide(self, text: str, previous: Optional[str] = None) -> tuple[Optional[str], dict]:
+        """Fast path label to act on (None to call hunter) and the prediction to check against hunter.
+
+        `previous` is hunter's last reply; a reply that asked the user something is answered by
+        hunter, since even a thank-you may accept what it proposed.
+        """
+        start = time.perf_counter()
+        label, confidence = self.classify(text)
+        elapsed = time.perf_counter() - start
+
+        pending = bool(previous) and "?" in previous
+        decided = label != OTHER and confidence >= self.threshold and not pending
+        shadowed = decided and random.random() < self.shadow_rate
+        with self._lock:
+            self.seconds += elapsed
+            if decided and not shadowed:
+                self.counters[f"fast_{label}"] += 1
+            else:
+                self.counters["shadowed" if shadowed else "fallback"] += 1
+        return (label if decided and not shadowed else None), {"label": label, "confidence": confidence}
+
+    def record(self, prediction: Optional[dict], tool_calls: list) -> None:
+        """Compare a prediction with hunter's routing of the same message."""
+        if not prediction or prediction["label"] == OTHER:
+            return
+        update_types = {tc["args"].get("update_type") for tc in tool_calls}
+        if prediction["label"] == BEGIN_INTERVIEW:
+            agreed = "active_application" in update_types
+        else:
+            agreed = not tool_calls
+        with self._lock:
+            self.counters["agree" if agreed else "disagree"] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {**self.counters, "seconds": self.seconds}
+
+    def prometheus(self) -> str:
+        stats = self.stats()
+        seconds = stats.pop("seconds")
+        lines = ["# HELP hunter_fast_route_total Fast path routing outcomes",
+                 "# TYPE hunter_fast_route_total counter"]
+        lines += [f'hunter_fast_route_total{{outcome="{outcome}"}} {count}' for outcome, count in sorted(stats.items())]
+        lines += ["# HELP hunter_fast_route_seconds_total Time spent classifying messages",
+                  "# TYPE hunter_fast_route_seconds_total counter",
+                  f"hunter_fast_route_seconds_total {seconds:.6f}"]
+        return "\n".join(lines) + "\n"
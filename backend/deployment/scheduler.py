@@ -0,0 +1,199 @@
+import asyncio
+import heapq
+import itertools
+import random
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable, Optional
+
+# Priorities for model calls; lower values are admitted first
+INTERACTIVE = 0  # hunter turns and the memory updates the user is waiting on
+BACKGROUND = 1  # analyst creation, interviews and the final report
+
+
+class PriorityLimiter:
+    """Concurrency limit that admits waiting callers in priority order (FIFO within a priority).
+
+    A limit of 0 or less disables the limit.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.active = 0
+        self._waiters: list[tuple[int, int, asyncio.Future]] = []
+        self._order = itertools.count()
+
+    @property
+    def idle(self) -> bool:
+        return self.active == 0 and not self._waiters
+
+    async def acquire(self, priority: int = INTERACTIVE) -> None:
+        if self.limit <= 0:
+            return
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._order), waiter))
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            # The slot may have been handed over just before the cancellation
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            raise
+
+    def release(self) -> None:
+        if self.limit <= 0:
+            return
+        # Hand the slot straight to the next waiter that is still waiting
+        while self._waiters:
+            _, _, waiter = heapq.heappop(self._waiters)
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+
+class TokenBucket:
+    """Request rate limit of `rate` requests per second with bursts of up to `capacity`.
+
+    A rate of 0 or less disables the limit.
+    """
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = max(capacity, 1)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class Scheduler:
+    """Admission control for model calls and interviews.
+
+    Model calls share a global concurrency limit that admits interactive calls before
+    background ones, wait on a token bucket per model, and are retried with jittered
+    exponential backoff when the provider answers 429. Interviews hold a slot for their
+    whole run under a global and a per-user limit, so a burst of analysts is queued
+    instead of fanning out at once.
+
+    Args:
+        max_model_calls: Model calls in flight at once (0 for no limit)
+        requests_per_second: Request rate allowed per model (0 for no limit)
+        burst: Requests a model may receive at once after being idle
+        max_retries: Retries of a rate limited model call
+        retry_delay: Base delay in seconds before the first retry
+        max_interviews: Interviews running at once across all users (0 for no limit)
+        max_user_interviews: Interviews running at once for a single user (0 for no limit)
+    """
+
+    def __init__(
+        self,
+        max_model_calls: int = 16,
+        requests_per_second: float = 0.0,
+        burst: int = 10,
+        max_retries: int = 5,
+        retry_delay: float = 1.0,
+        max_interviews: int = 8,
+        max_user_interviews: int = 2,
+    ):
+        self.max_model_calls = max_model_calls
+        self.requests_per_second = requests_per_second
+        self.burst = burst
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.max_interviews = max_interviews
+        self.max_user_interviews = max_user_interviews
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @classmethod
+    def from_configuration(cls, configurable) -> "Scheduler":
+        return cls(
+            max_model_calls=configurable.max_concurrent_model_calls,
+            requests_per_second=configurable.model_requests_per_second,
+            burst=configurable.model_burst,
+            max_retries=configurable.model_max_retries,
+            max_interviews=configurable.max_concurrent_interviews,
+            max_user_interviews=configurable.max_user_interviews,
+        )
+
+    def _reset(self) -> None:
+        """Create the asyncio primitives for the running event loop."""
+        loop = asyncio.get_running_loop()
+        if loop is self._loop:
+            return
+        self._loop = loop
+        self._model_calls = PriorityLimiter(self.max_model_calls)
+        self._buckets: dict[str, TokenBucket] = {}
+        self._interviews = PriorityLimiter(self.max_interviews)
+        self._user_interviews: dict[str, PriorityLimiter] = {}
+
+    async def call(self, fn: Callable[[], Awaitable[Any]], *, model: Any, priority: int = INTERACTIVE) -> Any:
+        """Run a model call once it is admitted, retrying it while the provider is rate limiting."""
+        self._reset()
+        name = getattr(model, "model_name", None) or type(model).__name__
+        bucket = self._buckets.get(name)
+        if bucket is None:
+            bucket = self._buckets[name] = TokenBucket(self.requests_per_second, self.burst)
+
+        for attempt in range(self.max_retries + 1):
+            await self._model_calls.acquire(priority)
+            try:
+                await bucket.acquire()
+                return await fn()
+            except Exception as e:
+                if attempt == self.max_retries or not is_rate_limited(e):
+                    raise
+                delay = retry_after(e) or min(60.0, self.retry_delay * 2 ** attempt) * random.uniform(0.5, 1.5)
+            finally:
+                self._model_calls.release()
+            await asyncio.sleep(delay)
+
+    @asynccontextmanager
+    async def interview(self, user_id: str):
+        """Hold an interview slot for the user."""
+        self._reset()
+        user_limiter = self._user_interviews.get(user_id)
+        if user_limiter is None:
+            user_limiter = self._user_interviews[user_id] = PriorityLimiter(self.max_user_interviews)
+
+        await user_limiter.acquire()
+        try:
+            await self._interviews.acquire()
+            try:
+                yield
+            finally:
+                self._interviews.release()
+        finally:
+            user_limiter.release()
+            if user_limiter.idle:
+                self._user_interviews.pop(user_id, None)
+
+
+def is_rate_limited(error: Exception) -> bool:
+    """Whether the error is a 429 from the model provider."""
+    status = getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None)
+    return status == 429 or type(error).__name__ == "RateLimitError"
+
+
+def retry_after(error: Exception) -> Optional[float]:
+    """Seconds to wait according to the provider's Retry-After header, if it sent one."""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
@@ -1,6 +1,10 @@
-from typing import Optional, Literal
+from typing import Any, Optional, Literal, Union
 from pydantic import BaseModel, Field
 from datetime import date
+from collections import OrderedDict
+import hashlib
+import json
+import threading
 
 # User profile schema
 
@@ -263,4 +267,105 @@ class Analyst(BaseModel):
 class Perspectives(BaseModel):
     analysts: list[Analyst] = Field(
         description="Comprehensive list of analysts with their roles.",
-    )
\ No newline at end of file
+    )
+
+# Interview
+class InterviewTurn(BaseModel):
+    """ Whether the interview should go on, and the interviewer's next message """
+    # The decision comes before the message, so a question can be streamed as soon as it is
+    # known to be asked
+    continue_interview: bool = Field(
+        description="True if the message is a question for the candidate, False if it closes the interview.",
+    )
+    information_gain: float = Field(
+        description="Estimate from 0 to 1 of how much new information relevant to your goals the answer to this question will add to what the interview has already covered. 0 if the interview is complete.",
+    )
+    message: str = Field(
+        description="The next question for the candidate, or a closing remark thanking them when the interview is complete.",
+    )
+
+# Prompt rendering
+
+# Rendered memories keyed by (content hash, budget)
+_rendered: OrderedDict = OrderedDict()
+_rendered_lock = threading.Lock()
+_RENDERED_MAXSIZE = 512
+
+def render_memory(memory: Any, budget: Union[int, dict, None] = None) -> str:
+    """Render a memory as compact indented text for a prompt.
+
+    Null, empty and default-empty fields are dropped, keys keep their schema order, and an
+    object with a single value (such as an Item with only content) collapses to that value.
+
+    Args:
+        memory: A stored memory value (dict), a list of them or a pydantic model
+        budget: Maximum characters per top-level section, either for every section (int)
+            or per section name (dict); longer sections are truncated
+    """
+    if isinstance(memory, BaseModel):
+        memory = memory.model_dump(mode="json")
+    if memory is None:
+        return "None"
+
+    digest = hashlib.sha1(json.dumps(memory, sort_keys=True, default=str).encode()).hexdigest()
+    key = (digest, json.dumps(budget, sort_keys=True))
+    with _rendered_lock:
+        text = _rendered.get(key)
+        if text is not None:
+            _rendered.move_to_end(key)
+            return text
+
+    pruned = _prune(memory)
+    if isinstance(pruned, dict):
+        sections = []
+        for name, value in pruned.items():
+            section = "\n".join(_render_lines(name, value, 0))
+            limit = budget.get(name) if isinstance(budget, dict) else budget
+            if limit and len(section) > limit:
+                # Keep whole lines where possible
+                cut = section[:limit]
+                section = (cut[:cut.rfind("\n")] if "\n" in cut else cut.rstrip()) + " ..."
+            sections.append(section)
+        text = "\n".join(sections)
+    else:
+        text = "\n".join(_render_lines(None, pruned, 0)) if pruned is not None else "None"
+
+    with _rendered_lock:
+        _rendered[key] = text
+        while len(_rendered) > _RENDERED_MAXSIZE:
+            _rendered.popitem(last=False)
+    return text
+
+def _prune(value: Any) -> Any:
+    """Drop None, empty strings and empty containers, recursively."""
+    if isinstance(value, dict):
+        pruned = {k: _prune(v) for k, v in value.items()}
+        return {k: v for k, v in pruned.items() if v is not None} or None
+    if isinstance(value, list):
+        pruned = [_prune(v) for v in value]
+        return [v for v in pruned if v is not None] or None
+    if isinstance(value, str):
+        return value.strip() or None
+    return value
+
+def _render_lines(name: Optional[str], value: Any, depth: int) -> list[str]:
+    pad = "  " * depth
+    label = f"{name}:" if name is not None else ""
+    # Collapse single-value objects into their value
+    while isinstance(value, dict) and len(value) == 1:
+        value = next(iter(value.values()))
+    if isinstance(value, dict):
+        lines = [f"{pad}{label}"] if label else []
+        for k, v in value.items():
+            lines += _render_lines(k, v, depth + 1 if label else depth)
+        return lines
+    if isinstance(value, list):
+        lines = [f"{pad}{label}"] if label else []
+        item_pad = "  " * (depth + 1 if label else depth)
+        for item in value:
+            item_lines = _render_lines(None, item, 0)
+            lines.append(f"{item_pad}- {item_lines[0]}")
+            lines += [f"{item_pad}  {line}" for line in item_lines[1:]]
+        return lines
+    text = str(value).replace("\n", "\n" + pad + "  ") if name is not None else str(value)
+    return [f"{pad}{label} {text}" if label else f"{pad}{text}"]
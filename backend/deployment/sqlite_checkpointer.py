@@ -0,0 +1,530 @@
+import asyncio
+import random
+import sqlite3
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Iterator, Optional, Sequence
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+)
+from langgraph.checkpoint.serde.types import TASKS
+
+from sqlite_store import connect
+
+try:
+    from langgraph.checkpoint.base import get_checkpoint_metadata
+except ImportError:  # older langgraph-checkpoint releases store metadata as given
+    def get_checkpoint_metadata(config: RunnableConfig, metadata: CheckpointMetadata) -> CheckpointMetadata:
+        return metadata
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkpoints (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    checkpoint_id TEXT NOT NULL,
+    parent_checkpoint_id TEXT,
+    type TEXT,
+    checkpoint BLOB,
+    metadata_type TEXT,
+    metadata BLOB,
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS blobs (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    channel TEXT NOT NULL,
+    version TEXT NOT NULL,
+    type TEXT NOT NULL,
+    blob BLOB,
+    base_version TEXT,
+    depth INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (thread_id, checkpoint_ns, channel, version)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS writes (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    checkpoint_id TEXT NOT NULL,
+    task_id TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    channel TEXT NOT NULL,
+    type TEXT,
+    blob BLOB,
+    task_path TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+) WITHOUT ROWID;
+"""
+
+
+class SqliteCheckpointer(BaseCheckpointSaver[str]):
+    """Disk-backed checkpointer that stores each checkpoint as a delta of the previous one.
+
+    Channel values are stored once per channel version, so a checkpoint only adds rows for
+    the channels that changed. List channels that only grew since their previous version
+    (e.g. `messages`, `sections`) are stored as the appended tail plus a reference to the
+    previous version; every `max_delta_depth` versions a full copy is written so reads
+    never walk more than that many rows.
+
+    Args:
+        path: Location of the database file.
+        retention: Number of checkpoints to keep per thread and namespace (0 keeps all).
+            Older checkpoints are pruned once a thread holds twice this many.
+        max_delta_depth: Maximum length of a delta chain before a full copy is stored.
+        timeout: Maximum number of seconds to wait on a locked database.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        *,
+        retention: int = 0,
+        max_delta_depth: int = 32,
+        timeout: float = 5.0,
+        serde=None,
+    ):
+        super().__init__(serde=serde)
+        self.path = path
+        self.retention = retention
+        self.max_delta_depth = max_delta_depth
+        self.timeout = timeout
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        # Last list value written per (thread_id, checkpoint_ns, channel), used as delta base
+        self._last_lists: OrderedDict[tuple[str, str, str], tuple[str, int, list]] = OrderedDict()
+        self._last_lists_maxsize = 1024
+        self._conn().executescript(SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = connect(self.path, self.timeout)
+            self._local.conn = conn
+        return conn
+
+    # Reads
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        conn = self._conn()
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        if checkpoint_id := get_checkpoint_id(config):
+            row = conn.execute(
+                """SELECT checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata_type, metadata
+                FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?""",
+                (thread_id, checkpoint_ns, checkpoint_id),
+            ).fetchone()
+        else:
+            row = conn.execute(
+                """SELECT checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata_type, metadata
+                FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ?
+                ORDER BY checkpoint_id DESC LIMIT 1""",
+                (thread_id, checkpoint_ns),
+            ).fetchone()
+        if row is None:
+            return None
+        return self._to_tuple(conn, thread_id, checkpoint_ns, row)
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        conn = self._conn()
+        query = """SELECT thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, type, checkpoint,
+            metadata_type, metadata FROM checkpoints"""
+        where, params = [], []
+        if config:
+            where.append("thread_id = ?")
+            params.append(config["configurable"]["thread_id"])
+            checkpoint_ns = config["configurable"].get("checkpoint_ns")
+            if checkpoint_ns is not None:
+                where.append("checkpoint_ns = ?")
+                params.append(checkpoint_ns)
+            if checkpoint_id := get_checkpoint_id(config):
+                where.append("checkpoint_id = ?")
+                params.append(checkpoint_id)
+        if before and (before_id := get_checkpoint_id(before)):
+            where.append("checkpoint_id < ?")
+            params.append(before_id)
+        if where:
+            query += " WHERE " + " AND ".join(where)
+        query += " ORDER BY checkpoint_id DESC"
+
+        count = 0
+        for thread_id, checkpoint_ns, *row in conn.execute(query, params).fetchall():
+            if limit is not None and count >= limit:
+                break
+            if filter:
+                metadata = self.serde.loads_typed((row[4], row[5]))
+                if not all(metadata.get(k) == v for k, v in filter.items()):
+                    continue
+            count += 1
+            yield self._to_tuple(conn, thread_id, checkpoint_ns, tuple(row))
+
+    def _to_tuple(self, conn: sqlite3.Connection, thread_id: str, checkpoint_ns: str, row: tuple) -> CheckpointTuple:
+        checkpoint_id, parent_checkpoint_id, type_, checkpoint, metadata_type, metadata = row
+        checkpoint = self.serde.loads_typed((type_, checkpoint))
+        checkpoint["channel_values"] = {
+            channel: value
+            for channel, version in checkpoint["channel_versions"].items()
+            if (value := self._load_value(conn, thread_id, checkpoint_ns, channel, version)) is not _EMPTY
+        }
+        if "pending_sends" in checkpoint:
+            # Older checkpoint formats read pending sends from the parent's task writes
+            checkpoint["pending_sends"] = [
+                self.serde.loads_typed((t, b))
+                for t, b in conn.execute(
+                    """SELECT type, blob FROM writes WHERE thread_id = ? AND checkpoint_ns = ?
+                    AND checkpoint_id = ? AND channel = ? ORDER BY task_path, task_id, idx""",
+                    (thread_id, checkpoint_ns, parent_checkpoint_id, TASKS),
+                )
+            ] if parent_checkpoint_id else []
+        pending_writes = [
+            (task_id, channel, self.serde.loads_typed((t, b)))
+            for task_id, channel, t, b in conn.execute(
+                """SELECT task_id, channel, type, blob FROM writes
+                WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?
+                ORDER BY task_id, idx""",
+                (thread_id, checkpoint_ns, checkpoint_id),
+            )
+        ]
+        return CheckpointTuple(
+            config=_config(thread_id, checkpoint_ns, checkpoint_id),
+            checkpoint=checkpoint,
+            metadata=self.serde.loads_typed((metadata_type, metadata)),
+            parent_config=(
+                _config(thread_id, checkpoint_ns, parent_checkpoint_id) if parent_checkpoint_id else None
+            ),
+            pending_writes=pending_writes,
+        )
+
+    def _load_value(self, conn: sqlite3.Connection, thread_id: str, checkpoint_ns: str, channel: str, version: str) -> Any:
+        row = conn.execute(
+            """SELECT type, blob, base_version FROM blobs
+            WHERE thread_id = ? AND checkpoint_ns = ? AND channel = ? AND version = ?""",
+            (thread_id, checkpoint_ns, channel, str(version)),
+        ).fetchone()
+        if row is None or row[0] == "empty":
+            return _EMPTY
+        type_, blob, base_version = row
+        value = self.serde.loads_typed((type_, blob))
+        if base_version is None:
+            return value
+        base = self._load_value(conn, thread_id, checkpoint_ns, channel, base_version)
+        if base is _EMPTY:
+            raise ValueError(
+                f"Missing delta base {base_version} of channel {channel!r} version {version} "
+                f"in thread {thread_id!r}"
+            )
+        return base + value
+
+    # Writes
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint = checkpoint.copy()
+        values = checkpoint.pop("channel_values")
+
+        blobs, cached = [], {}
+        for channel, version in new_versions.items():
+            encoded, cached[channel] = self._encode_value(
+                thread_id, checkpoint_ns, channel, str(version), values.get(channel, _EMPTY)
+            )
+            blobs.append((thread_id, checkpoint_ns, channel, str(version), *encoded))
+        type_, serialized = self.serde.dumps_typed(checkpoint)
+        metadata_type, serialized_metadata = self.serde.dumps_typed(get_checkpoint_metadata(config, metadata))
+
+        conn = self._conn()
+        with self._lock:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                # A delta base cached by this process may have been pruned by another worker (or
+                # never committed); store those values in full instead
+                for i, (_, _, channel, version, _, _, base_version, _) in enumerate(blobs):
+                    if base_version is not None and conn.execute(
+                        """SELECT 1 FROM blobs
+                        WHERE thread_id = ? AND checkpoint_ns = ? AND channel = ? AND version = ?""",
+                        (thread_id, checkpoint_ns, channel, base_version),
+                    ).fetchone() is None:
+                        value = values[channel]
+                        blobs[i] = (thread_id, checkpoint_ns, channel, version, *self.serde.dumps_typed(value), None, 0)
+                        cached[channel] = (version, 0, list(value))
+                conn.executemany(
+                    """INSERT OR REPLACE INTO blobs
+                    (thread_id, checkpoint_ns, channel, version, type, blob, base_version, depth)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+                    blobs,
+                )
+                conn.execute(
+                    """INSERT OR REPLACE INTO checkpoints
+                    (thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata_type, metadata)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+                    (
+                        thread_id, checkpoint_ns, checkpoint["id"], config["configurable"].get("checkpoint_id"),
+                        type_, serialized, metadata_type, serialized_metadata,
+                    ),
+                )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+            # Only committed values can be delta bases
+            for channel, entry in cached.items():
+                if entry is not None:
+                    key = (thread_id, checkpoint_ns, channel)
+                    self._last_lists[key] = entry
+                    self._last_lists.move_to_end(key)
+            while len(self._last_lists) > self._last_lists_maxsize:
+                self._last_lists.popitem(last=False)
+
+        if self.retention:
+            (count,) = conn.execute(
+                "SELECT COUNT(*) FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ?",
+                (thread_id, checkpoint_ns),
+            ).fetchone()
+            if count > 2 * self.retention:
+                self.prune(thread_id, checkpoint_ns)
+
+        return _config(thread_id, checkpoint_ns, checkpoint["id"])
+
+    def _encode_value(self, thread_id: str, checkpoint_ns: str, channel: str, version: str, value: Any) -> tuple:
+        """Serialize a channel value as (type, blob, base_version, depth).
+
+        Also returns the entry to cache as the channel's next delta base once the value is
+        committed (None for values that are not lists).
+        """
+        if value is _EMPTY:
+            return ("empty", None, None, 0), None
+        if not isinstance(value, list):
+            return (*self.serde.dumps_typed(value), None, 0), None
+
+        key = (thread_id, checkpoint_ns, channel)
+        with self._lock:
+            last = self._last_lists.pop(key, None)
+
+        encoded = None
+        depth = 0
+        if last is not None:
+            base_version, base_depth, base = last
+            if base_depth < self.max_delta_depth and len(base) <= len(value) and value[: len(base)] == base:
+                depth = base_depth + 1
+                encoded = (*self.serde.dumps_typed(value[len(base):]), base_version, depth)
+        if encoded is None:
+            encoded = (*self.serde.dumps_typed(value), None, 0)
+
+        return encoded, (version, depth, list(value))
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        # Special writes (errors, interrupts) replace earlier ones, regular writes are only recorded once
+        query = (
+            "INSERT OR REPLACE INTO writes"
+            if all(channel in WRITES_IDX_MAP for channel, _ in writes)
+            else "INSERT OR IGNORE INTO writes"
+        ) + """ (thread_id, checkpoint_ns, checkpoint_id, task_id, idx, channel, type, blob, task_path)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"""
+        rows = [
+            (
+                thread_id, checkpoint_ns, checkpoint_id, task_id, WRITES_IDX_MAP.get(channel, idx),
+                channel, *self.serde.dumps_typed(value), task_path,
+            )
+            for idx, (channel, value) in enumerate(writes)
+        ]
+        conn = self._conn()
+        with self._lock:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.executemany(query, rows)
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    def delete_thread(self, thread_id: str) -> None:
+        conn = self._conn()
+        with self._lock:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                for table in ("checkpoints", "blobs", "writes"):
+                    conn.execute(f"DELETE FROM {table} WHERE thread_id = ?", (thread_id,))
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            for key in [k for k in self._last_lists if k[0] == thread_id]:
+                del self._last_lists[key]
+
+    # Retention
+
+    def prune(self, thread_id: str, checkpoint_ns: str = "", keep: Optional[int] = None) -> int:
+        """Delete all but the newest `keep` checkpoints of a thread namespace and the data only they used.
+
+        Returns the number of checkpoints deleted.
+        """
+        keep = keep if keep is not None else self.retention
+        if not keep:
+            return 0
+        conn = self._conn()
+        with self._lock:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                kept = conn.execute(
+                    """SELECT checkpoint_id, type, checkpoint FROM checkpoints
+                    WHERE thread_id = ? AND checkpoint_ns = ? ORDER BY checkpoint_id DESC LIMIT ?""",
+                    (thread_id, checkpoint_ns, keep),
+                ).fetchall()
+                if not kept:
+                    conn.execute("COMMIT")
+                    return 0
+                oldest_kept = kept[-1][0]
+                deleted = conn.execute(
+                    "DELETE FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id < ?",
+                    (thread_id, checkpoint_ns, oldest_kept),
+                ).rowcount
+                conn.execute(
+                    "DELETE FROM writes WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id < ?",
+                    (thread_id, checkpoint_ns, oldest_kept),
+                )
+
+                # Keep every blob reachable from a remaining checkpoint, including delta bases
+                bases = {
+                    (channel, version): base
+                    for channel, version, base in conn.execute(
+                        "SELECT channel, version, base_version FROM blobs WHERE thread_id = ? AND checkpoint_ns = ?",
+                        (thread_id, checkpoint_ns),
+                    )
+                }
+                live: set[tuple[str, str]] = set()
+                for _, type_, checkpoint in kept:
+                    for channel, version in self.serde.loads_typed((type_, checkpoint))["channel_versions"].items():
+                        key = (channel, str(version))
+                        while key in bases and key not in live:
+                            live.add(key)
+                            key = (channel, bases[key]) if bases[key] is not None else None
+                conn.executemany(
+                    "DELETE FROM blobs WHERE thread_id = ? AND checkpoint_ns = ? AND channel = ? AND version = ?",
+                    [(thread_id, checkpoint_ns, *key) for key in bases if key not in live],
+                )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        return deleted
+
+    def compact(self, keep: Optional[int] = None) -> int:
+        """Apply retention to every thread and reclaim the freed disk space.
+
+        Returns the number of checkpoints deleted.
+        """
+        conn = self._conn()
+        deleted = sum(
+            self.prune(thread_id, checkpoint_ns, keep)
+            for thread_id, checkpoint_ns in conn.execute(
+                "SELECT DISTINCT thread_id, checkpoint_ns FROM checkpoints"
+            ).fetchall()
+        )
+        with self._lock:
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            conn.execute("VACUUM")
+        return deleted
+
+    def get_next_version(self, current: Optional[str], channel: None) -> str:
+        if current is None:
+            current_v = 0
+        elif isinstance(current, int):
+            current_v = current
+        else:
+            current_v = int(current.split(".")[0])
+        next_v = current_v + 1
+        next_h = random.random()
+        return f"{next_v:032}.{next_h:016}"
+
+    # Async variants run the sync implementation in the default executor
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return await asyncio.get_running_loop().run_in_executor(None, self.get_tuple, config)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        items = await asyncio.get_running_loop().run_in_executor(
+            None, lambda: list(self.list(config, filter=filter, before=before, limit=limit))
+        )
+        for item in items:
+            yield item
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        return await asyncio.get_running_loop().run_in_executor(
+            None, self.put, config, checkpoint, metadata, new_versions
+        )
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        await asyncio.get_running_loop().run_in_executor(
+            None, self.put_writes, config, writes, task_id, task_path
+        )
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.get_running_loop().run_in_executor(None, self.delete_thread, thread_id)
+
+
+_EMPTY = object()
+
+
+def _config(thread_id: str, checkpoint_ns: str, checkpoint_id: str) -> RunnableConfig:
+    return {
+        "configurable": {
+            "thread_id": thread_id,
+            "checkpoint_ns": checkpoint_ns,
+            "checkpoint_id": checkpoint_id,
+        }
+    }
+
+
+if __name__ == "__main__":
+    # Compaction job: python sqlite_checkpointer.py <path> <keep>
+    path, keep = sys.argv[1], int(sys.argv[2])
+    print(f"Deleted {SqliteCheckpointer(path).compact(keep)} checkpoints")
@@ -0,0 +1,243 @@
+import asyncio
+import json
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from typing import Any, Iterable, Optional
+
+from langgraph.store.base import (
+    BaseStore,
+    GetOp,
+    Item,
+    ListNamespacesOp,
+    Op,
+    PutOp,
+    Result,
+    SearchItem,
+    SearchOp,
+)
+
+# Namespace labels cannot contain periods, so they are safe to join on.
+# "/" is the next character after "." and bounds the range of child namespaces.
+SEPARATOR = "."
+SEPARATOR_END = "/"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS store (
+    prefix TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    PRIMARY KEY (prefix, key)
+) WITHOUT ROWID;
+"""
+
+
+class SqliteStore(BaseStore):
+    """Durable long-term memory store backed by a single SQLite database in WAL mode.
+
+    Items are indexed on (namespace, key), so gets are point lookups and namespace
+    searches are range scans over the primary key. WAL mode lets any number of
+    processes on the host read while one of them writes, and every write in a
+    batch is applied in a single transaction.
+
+    Args:
+        path: Location of the database file.
+        timeout: Maximum number of seconds to wait on a locked database.
+    """
+
+    def __init__(self, path: str, *, timeout: float = 5.0):
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+        self._connections: list[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        self._conn().executescript(SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        """Connection for the current thread."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = connect(self.path, self.timeout)
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def close(self) -> None:
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
+
+    def batch(self, ops: Iterable[Op]) -> list[Result]:
+        ops = list(ops)
+        results: list[Result] = [None] * len(ops)
+        conn = self._conn()
+
+        # Reads see the store as it was before this batch's writes, like InMemoryStore
+        puts: dict[tuple[str, str], PutOp] = {}
+        for i, op in enumerate(ops):
+            if isinstance(op, GetOp):
+                results[i] = self._get(conn, op)
+            elif isinstance(op, SearchOp):
+                results[i] = self._search(conn, op)
+            elif isinstance(op, ListNamespacesOp):
+                results[i] = self._list_namespaces(conn, op)
+            elif isinstance(op, PutOp):
+                # Only the last write to a key in a batch counts
+                puts[(_encode(op.namespace), op.key)] = op
+            else:
+                raise ValueError(f"Unknown operation type: {type(op)}")
+
+        if puts:
+            self._apply_puts(conn, puts)
+        return results
+
+    async def abatch(self, ops: Iterable[Op]) -> list[Result]:
+        return await asyncio.get_running_loop().run_in_executor(None, self.batch, list(ops))
+
+    def _get(self, conn: sqlite3.Connection, op: GetOp) -> Optional[Item]:
+        row = conn.execute(
+            "SELECT prefix, key, value, created_at, updated_at FROM store WHERE prefix = ? AND key = ?",
+            (_encode(op.namespace), op.key),
+        ).fetchone()
+        return _row_to_item(row, Item) if row else None
+
+    def _search(self, conn: sqlite3.Connection, op: SearchOp) -> list[SearchItem]:
+        query = "SELECT prefix, key, value, created_at, updated_at FROM store"
+        params: list[Any] = []
+        if op.namespace_prefix:
+            prefix = _encode(op.namespace_prefix)
+            query += " WHERE (prefix = ? OR (prefix > ? AND prefix < ?))"
+            params += [prefix, prefix + SEPARATOR, prefix + SEPARATOR_END]
+        query += " ORDER BY created_at, prefix, key"
+
+        if not op.filter:
+            query += " LIMIT ? OFFSET ?"
+            params += [op.limit, op.offset]
+            return [_row_to_item(row, SearchItem) for row in conn.execute(query, params)]
+
+        items = [
+            item
+            for item in (_row_to_item(row, SearchItem) for row in conn.execute(query, params))
+            if _matches(item.value, op.filter)
+        ]
+        return items[op.offset : op.offset + op.limit]
+
+    def _list_namespaces(self, conn: sqlite3.Connection, op: ListNamespacesOp) -> list[tuple[str, ...]]:
+        namespaces = [_decode(row[0]) for row in conn.execute("SELECT DISTINCT prefix FROM store")]
+        if op.match_conditions:
+            namespaces = [
+                ns for ns in namespaces
+                if all(_matches_condition(ns, condition) for condition in op.match_conditions)
+            ]
+        if op.max_depth is not None:
+            namespaces = [ns[: op.max_depth] for ns in namespaces]
+        namespaces = sorted(set(namespaces))
+        return namespaces[op.offset : op.offset + op.limit]
+
+    def _apply_puts(self, conn: sqlite3.Connection, puts: dict[tuple[str, str], PutOp]) -> None:
+        now = datetime.now(timezone.utc).isoformat()
+        upserts = []
+        deletes = []
+        for (prefix, key), op in puts.items():
+            if op.value is None:
+                deletes.append((prefix, key))
+            else:
+                upserts.append((prefix, key, json.dumps(op.value), now, now))
+
+        with self._lock:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                if deletes:
+                    conn.executemany("DELETE FROM store WHERE prefix = ? AND key = ?", deletes)
+                if upserts:
+                    conn.executemany(
+                        """
+                        INSERT INTO store (prefix, key, value, created_at, updated_at)
+                        VALUES (?, ?, ?, ?, ?)
+                        ON CONFLICT (prefix, key) DO UPDATE SET
+                            value = excluded.value,
+                            updated_at = excluded.updated_at
+                        """,
+                        upserts,
+                    )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+
+def connect(path: str, timeout: float) -> sqlite3.Connection:
+    """Open an autocommit connection in WAL mode that waits at most `timeout` seconds on locks."""
+    conn = sqlite3.connect(path, timeout=timeout, isolation_level=None, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA busy_timeout={int(timeout * 1000)}")
+    return conn
+
+
+def _encode(namespace: tuple[str, ...]) -> str:
+    return SEPARATOR.join(namespace)
+
+
+def _decode(prefix: str) -> tuple[str, ...]:
+    return tuple(prefix.split(SEPARATOR))
+
+
+def _row_to_item(row: tuple, cls: type) -> Item:
+    prefix, key, value, created_at, updated_at = row
+    return cls(
+        namespace=_decode(prefix),
+        key=key,
+        value=json.loads(value),
+        created_at=datetime.fromisoformat(created_at),
+        updated_at=datetime.fromisoformat(updated_at),
+    )
+
+
+def _matches(value: dict, filter: dict) -> bool:
+    """Check a stored value against an equality / comparison filter."""
+    for path, expected in filter.items():
+        actual: Any = value
+        for part in path.split("."):
+            actual = actual.get(part) if isinstance(actual, dict) else None
+        if isinstance(expected, dict) and expected and all(k.startswith("$") for k in expected):
+            for operator, operand in expected.items():
+                if not _compare(actual, operator, operand):
+                    return False
+        elif actual != expected:
+            return False
+    return True
+
+
+def _compare(actual: Any, operator: str, operand: Any) -> bool:
+    if operator == "$eq":
+        return actual == operand
+    if operator == "$ne":
+        return actual != operand
+    if actual is None:
+        return False
+    if operator == "$gt":
+        return actual > operand
+    if operator == "$gte":
+        return actual >= operand
+    if operator == "$lt":
+        return actual < operand
+    if operator == "$lte":
+        return actual <= operand
+    raise ValueError(f"Unsupported filter operator: {operator}")
+
+
+def _matches_condition(namespace: tuple[str, ...], condition) -> bool:
+    path = tuple(condition.path)
+    if len(path) > len(namespace):
+        return False
+    if condition.match_type == "prefix":
+        candidate = namespace[: len(path)]
+    else:
+        candidate = namespace[len(namespace) - len(path) :]
+    return all(p == "*" or p == n for p, n in zip(path, candidate))
@@ -1,4 +1,48 @@
 from trustcall import create_extractor
+from langchain_core.messages import HumanMessage, SystemMessage, ToolMessage, get_buffer_string, merge_message_runs, message_chunk_to_message
+from langchain_core.messages.utils import count_tokens_approximately
+from langchain_core.utils.json import parse_partial_json
+from langgraph.config import get_stream_writer
+from pydantic import ValidationError
+
+import hashlib
+import json
+import threading
+import uuid
+
+# Prebuilt Trustcall extractors keyed by (model, schema, enable_inserts)
+_extractors = {}
+_extractors_lock = threading.Lock()
+
+def get_extractor(model, schema, enable_inserts=False, spy=None):
+    """Get the Trustcall extractor for a schema, building it only on first use.
+
+    Args:
+        model: Chat model the extractor calls
+        schema: Pydantic model used as the extraction tool
+        enable_inserts: Whether the extractor may create new documents
+        spy: Optional Spy to attach as an on_end listener for this call
+    """
+    key = (id(model), schema, enable_inserts)
+    entry = _extractors.get(key)
+    if entry is None:
+        with _extractors_lock:
+            entry = _extractors.get(key)
+            if entry is None:
+                extractor = create_extractor(
+                    model,
+                    tools=[schema],
+                    tool_choice=schema.__name__,
+                    enable_inserts=enable_inserts,
+                )
+                # Keep a reference to the model so its id is not reused
+                entry = _extractors[key] = (model, extractor)
+    extractor = entry[1]
+
+    # Binding a listener only wraps the prebuilt extractor
+    if spy is not None:
+        return extractor.with_listeners(on_end=spy)
+    return extractor
 
 # Inspect the tool calls made by Trustcall
 class Spy:
@@ -61,4 +105,212 @@ def extract_tool_info(tool_calls, schema_name="Memory"):
                 f"Content: {change['value']}"
             )
     
-    return "\n\n".join(result_parts)
\ No newline at end of file
+    return "\n\n".join(result_parts)
+
+EARLIER_CONTEXT = """Earlier conversation (already reflected in memory, shown for context only):
+
+{context}"""
+
+def reflection_messages(instruction, messages, watermark=None, window=None, max_chars=500):
+    """Build the messages a Trustcall extractor reflects on.
+
+    Args:
+        instruction: System instruction for the extractor
+        messages: Chat history, excluding the tool call that triggered the update
+        watermark: ID of the newest message already reflected into this memory, if any
+        window: Number of earlier messages summarized for context. None sends the full history.
+        max_chars: Maximum length of each summarized earlier message
+
+    Returns:
+        The messages to send (None if nothing is new since the watermark) and the new watermark
+    """
+    if not messages:
+        return None, watermark
+    new_watermark = messages[-1].id
+    if window is None:
+        return list(merge_message_runs([SystemMessage(content=instruction)] + messages)), new_watermark
+
+    # Find the first message after the watermark; an unknown watermark means nothing was reflected
+    start = 0
+    if watermark is not None:
+        for i in range(len(messages) - 1, -1, -1):
+            if messages[i].id == watermark:
+                start = i + 1
+                break
+    # Tool results cannot lead the conversation without the call that produced them
+    while start < len(messages) and isinstance(messages[start], ToolMessage):
+        start += 1
+    if start >= len(messages):
+        return None, new_watermark
+
+    system = [SystemMessage(content=instruction)]
+    earlier = messages[max(0, start - window):start]
+    if earlier:
+        context = "\n".join(
+            text if len(text) <= max_chars else text[:max_chars] + "..."
+            for text in (get_buffer_string([m]) for m in earlier)
+        )
+        system.append(SystemMessage(content=EARLIER_CONTEXT.format(context=context)))
+    return list(merge_message_runs(system + messages[start:])), new_watermark
+
+
+def unsummarized_messages(messages, summarized_through=None):
+    """Messages newer than the last one folded into the history summary (all of them if none was)."""
+    if summarized_through is not None:
+        for i in range(len(messages) - 1, -1, -1):
+            if messages[i].id == summarized_through:
+                return messages[i + 1:]
+    return messages
+
+
+def history_cut(messages, keep_tokens):
+    """Index of the first message to keep so that about `keep_tokens` of recent history remain.
+
+    The kept history starts at a human message, so tool calls stay with their results,
+    and always includes the latest human message. Returns 0 when nothing can be folded.
+    """
+    cut = len(messages)
+    total = 0
+    for i in range(len(messages) - 1, -1, -1):
+        total += count_tokens_approximately([messages[i]])
+        if total > keep_tokens:
+            break
+        cut = i
+    human = [i for i, m in enumerate(messages) if isinstance(m, HumanMessage)]
+    return next((i for i in human if i >= cut), human[-1] if human else 0)
+
+
+def content_hash(value):
+    """Canonical hash of a JSON-serializable memory value."""
+    return hashlib.sha1(json.dumps(value, sort_keys=True, separators=(",", ":"), default=str).encode()).hexdigest()
+
+
+def posting_id(posting):
+    """Stable ID of a job posting, derived from its company and job title."""
+    company = (posting.get("company") or {}).get("name") or ""
+    return content_hash([company.strip().lower(), (posting.get("job_title") or "").strip().lower()])[:16]
+
+
+def application_id(application, doc_id=None):
+    """Stable ID of an application: the ID of its posting.
+
+    A posting without a company or job title has no ID of its own, so such applications keep
+    the ID of the document Trustcall patched (`doc_id`), or get a new one.
+    """
+    posting = application.get("posting") or {}
+    if not ((posting.get("company") or {}).get("name") or "").strip() and not (posting.get("job_title") or "").strip():
+        return doc_id or str(uuid.uuid4())
+    return posting_id(posting)
+
+
+async def save_responses(store, namespace, result, existing_items):
+    """Save Trustcall responses to the store, skipping documents identical to the stored ones.
+
+    `existing_items` are the items the extractor was given. Returns (written, skipped) counts.
+    """
+    existing = {item.key: content_hash(item.value) for item in existing_items or []}
+    written = skipped = 0
+    for r, rmeta in zip(result["responses"], result["response_metadata"]):
+        key = rmeta.get("json_doc_id", str(uuid.uuid4()))
+        value = r.model_dump(mode="json")
+        if existing.get(key) == content_hash(value):
+            skipped += 1
+            continue
+        await store.aput(namespace, key, value)
+        written += 1
+    return written, skipped
+
+
+def merge_responses(existing, result, field, doc_id):
+    """Fold Trustcall responses into a single collection.
+
+    The response patching document `doc_id` replaces `existing`; the entries of documents
+    Trustcall inserted instead are appended to it.
+    """
+    merged = existing or {field: []}
+    inserted = []
+    for r, rmeta in zip(result["responses"], result["response_metadata"]):
+        value = r.model_dump(mode="json")
+        if rmeta.get("json_doc_id") == doc_id:
+            merged = value
+        else:
+            inserted += value.get(field) or []
+    return {**merged, field: [*(merged.get(field) or []), *inserted]}
+
+
+def write_summary(content, written, skipped):
+    """Append the written and skipped counts of save_responses to a tool message."""
+    return f"{content or 'no changes'} ({written} written, {skipped} unchanged)"
+
+
+def tool_messages(state, content):
+    """Respond to the tool calls handled by a memory update node.
+
+    route_message passes the ids of the calls a node handles in `tool_call_ids`;
+    otherwise the node answers the first tool call of the last message.
+    """
+    tool_call_ids = state.get("tool_call_ids") or [state["messages"][-1].tool_calls[0]["id"]]
+    return [{"role": "tool", "content": content, "tool_call_id": tool_call_id} for tool_call_id in tool_call_ids]
+
+
+async def astream_model(model, messages, **event):
+    """Call a chat model inside a graph node, streaming its tokens to the graph's custom stream.
+
+    Each token is written as {"type": "token", "id": <message id>, "delta": <text>, **event},
+    so clients streaming with stream_mode="custom" can render the response as it is generated.
+    Returns the complete message.
+    """
+    writer = get_stream_writer()
+    response = None
+    async for chunk in model.astream(messages):
+        response = chunk if response is None else response + chunk
+        if chunk.content:
+            writer({"type": "token", "id": response.id, "delta": chunk.content, **event})
+    return message_chunk_to_message(response)
+
+
+async def astream_structured(model, messages, schema, field, ready=lambda partial: True, **event):
+    """Call a chat model for a `schema` tool call, streaming its `field` string like astream_model.
+
+    The field's text is written to the custom stream as the tool call arguments arrive, from
+    the first chunk where `ready(partial_args)` is true; text generated before that is written
+    in one piece when streaming starts. Returns the validated schema instance (None if the
+    arguments do not validate), the complete message and whether the field was streamed.
+    """
+    writer = get_stream_writer()
+    response = None
+    streamed = None
+    async for chunk in model.bind_tools([schema], tool_choice=schema.__name__).astream(messages):
+        response = chunk if response is None else response + chunk
+        args = "".join(tc.get("args") or "" for tc in response.tool_call_chunks)
+        try:
+            partial = parse_partial_json(args) or {} if args else {}
+        except ValueError:
+            continue
+        value = partial.get(field)
+        if not isinstance(value, str) or (streamed is None and not ready(partial)):
+            continue
+        streamed = streamed or ""
+        if len(value) > len(streamed) and value.startswith(streamed):
+            writer({"type": "token", "id": response.id, "delta": value[len(streamed):], **event})
+            streamed = value
+    message = message_chunk_to_message(response)
+    try:
+        parsed = schema.model_validate(message.tool_calls[0]["args"])
+    except (IndexError, ValidationError):
+        parsed = None
+    return parsed, message, streamed is not None
+
+
+def message_tokens(message):
+    """Tokens used by the call that produced a message, estimated when the provider reports no usage."""
+    usage = getattr(message, "usage_metadata", None)
+    if usage:
+        return usage.get("total_tokens", 0)
+    return count_tokens_approximately([message])
+
+
+def write_message(message, **event):
+    """Write a complete message to the graph's custom stream as a single token event, like astream_model."""
+    if message.content:
+        get_stream_writer()({"type": "token", "id": message.id, "delta": message.content, **event})
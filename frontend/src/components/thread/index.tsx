@@ -8,6 +8,7 @@ import { Button } from "../ui/button";
 import { Checkpoint, Message } from "@langchain/langgraph-sdk";
 import { AssistantMessage, AssistantMessageLoading } from "./messages/ai";
 import { HumanMessage } from "./messages/human";
+import { LiveTurns } from "./messages/live-turns";
 import {
   DO_NOT_RENDER_ID_PREFIX,
   ensureToolCallsHaveResponses,
@@ -144,7 +145,7 @@ export function Thread() {
     stream.submit(
       { messages: [...toolMessages, newHumanMessage] },
       {
-        streamMode: ["values"],
+        streamMode: ["values", "custom"],
         optimisticValues: (prev) => ({
           ...prev,
           messages: [
@@ -167,7 +168,7 @@ export function Thread() {
     setFirstTokenReceived(false);
     stream.submit(undefined, {
       checkpoint: parentCheckpoint,
-      streamMode: ["values"],
+      streamMode: ["values", "custom"],
     });
   };
 
@@ -312,6 +313,7 @@ export function Thread() {
                       />
                     ),
                   )}
+                {isLoading && <LiveTurns />}
                 {isLoading && !firstTokenReceived && (
                   <AssistantMessageLoading />
                 )}
@@ -0,0 +1,29 @@
+import { useLiveTurns } from "@/providers/Stream";
+import { MarkdownText } from "../markdown-text";
+
+const NODE_LABELS: Record<string, string> = {
+  ask_question: "Interviewer",
+  answer_question: "Candidate",
+  write_section: "Report section",
+  finalize_interview: "Final report",
+};
+
+export function LiveTurns() {
+  const liveTurns = useLiveTurns();
+
+  return (
+    <>
+      {liveTurns.map((turn) => (
+        <div key={turn.id} className="flex flex-col gap-1 mr-auto">
+          <span className="text-xs text-muted-foreground">
+            {NODE_LABELS[turn.node] ?? turn.node}
+            {turn.analyst && ` · ${turn.analyst}`}
+          </span>
+          <div className="py-1">
+            <MarkdownText>{turn.content}</MarkdownText>
+          </div>
+        </div>
+      ))}
+    </>
+  );
+}
@@ -25,6 +25,31 @@ import { toast } from "sonner";
 
 export type StateType = { messages: Message[]; ui?: UIMessage[] };
 
+// Token streamed by an interview or report node through the custom stream
+export type TokenEvent = {
+  type: "token";
+  id: string;
+  delta: string;
+  node: string;
+  analyst?: string;
+};
+
+// A response that is still being generated by an interview or report node
+export type LiveTurn = {
+  id: string;
+  node: string;
+  analyst?: string;
+  content: string;
+};
+
+function isTokenEvent(event: unknown): event is TokenEvent {
+  return (
+    typeof event === "object" &&
+    event !== null &&
+    (event as { type?: unknown }).type === "token"
+  );
+}
+
 const useTypedStream = useStream<
   StateType,
   {
@@ -32,12 +57,13 @@ const useTypedStream = useStream<
       messages?: Message[] | Message | string;
       ui?: (UIMessage | RemoveUIMessage)[] | UIMessage | RemoveUIMessage;
     };
-    CustomEventType: UIMessage | RemoveUIMessage;
+    CustomEventType: UIMessage | RemoveUIMessage | TokenEvent;
   }
 >;
 
 type StreamContextType = ReturnType<typeof useTypedStream>;
 const StreamContext = createContext<StreamContextType | undefined>(undefined);
+const LiveTurnsContext = createContext<LiveTurn[]>([]);
 
 async function sleep(ms = 4000) {
   return new Promise((resolve) => setTimeout(resolve, ms));
@@ -76,12 +102,36 @@ const StreamSession = ({
 }) => {
   const [threadId, setThreadId] = useQueryParam("threadId", StringParam);
   const { getThreads, setThreads } = useThreads();
+  const [liveTurns, setLiveTurns] = useState<LiveTurn[]>([]);
   const streamValue = useTypedStream({
     apiUrl,
     apiKey: apiKey ?? undefined,
     assistantId,
     threadId: threadId ?? null,
     onCustomEvent: (event, options) => {
+      if (isTokenEvent(event)) {
+        setLiveTurns((prev) => {
+          const index = prev.findIndex((turn) => turn.id === event.id);
+          if (index === -1) {
+            return [
+              ...prev,
+              {
+                id: event.id,
+                node: event.node,
+                analyst: event.analyst,
+                content: event.delta,
+              },
+            ];
+          }
+          const next = [...prev];
+          next[index] = {
+            ...next[index],
+            content: next[index].content + event.delta,
+          };
+          return next;
+        });
+        return;
+      }
       options.mutate((prev) => {
         const ui = uiMessageReducer(prev.ui ?? [], event);
         return { ...prev, ui };
@@ -95,6 +145,11 @@ const StreamSession = ({
     },
   });
 
+  // Live turns only cover the current run
+  useEffect(() => {
+    if (streamValue.isLoading) setLiveTurns([]);
+  }, [streamValue.isLoading]);
+
   useEffect(() => {
     checkGraphStatus(apiUrl, apiKey).then((ok) => {
       if (!ok) {
@@ -115,7 +170,9 @@ const StreamSession = ({
 
   return (
     <StreamContext.Provider value={streamValue}>
-      {children}
+      <LiveTurnsContext.Provider value={liveTurns}>
+        {children}
+      </LiveTurnsContext.Provider>
     </StreamContext.Provider>
   );
 };
@@ -252,4 +309,7 @@ export const useStreamContext = (): StreamContextType => {
   return context;
 };
 
+// Responses streamed by interview and report nodes during the current run
+export const useLiveTurns = (): LiveTurn[] => useContext(LiveTurnsContext);
+
 export default StreamContext;